@@ -0,0 +1,89 @@
+"""Compare the raw JSON corpus with the block-compressed corpus formats.
+
+Run from the directory holding dataset.json:
+
+    python benchmark_corpus.py [--lookups 2000]
+
+For each format it reports the file size, the Python memory holding the
+verse texts, random verse lookup latency with a cold and a warm chapter
+LRU, and full-scan throughput.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import bible_cli
+from bible_cli import (
+    COMPRESSION_CODECS, DATASET_FILE, CompressedCorpus, CompressedVerses,
+    display_stats_table, iter_dataset_books, write_compressed_corpus
+)
+
+def load_raw():
+    """The verse texts as one list, as the CLI holds them"""
+    return [verse for book in iter_dataset_books(DATASET_FILE)
+            for chapter in book["chapters"] for verse in chapter]
+
+def traced(load):
+    """Call load and return (result, bytes it left allocated)"""
+    tracemalloc.start()
+    result = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def lookup_latency(verses, verse_ids, clear=None):
+    """Mean microseconds to read one verse; clear empties the LRU before each read"""
+    elapsed = 0.0
+    for verse_id in verse_ids:
+        if clear:
+            clear()
+        started = time.perf_counter()
+        verses[verse_id]
+        elapsed += time.perf_counter() - started
+    return elapsed / len(verse_ids) * 1e6
+
+def scan_throughput(verses):
+    """Megabytes of verse text per second for a case-insensitive scan"""
+    started = time.perf_counter()
+    size = 0
+    for verse in verses:
+        size += len(verse)
+        "lord" in verse.lower()
+    return size / (time.perf_counter() - started) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=2000, help="Random verses to look up")
+    args = parser.parse_args()
+    if bible_cli.corpus_file != DATASET_FILE:
+        parser.error(f"run from a directory with {DATASET_FILE}")
+
+    rng = random.Random(0)
+    raw, raw_memory = traced(load_raw)
+    verse_ids = [rng.randrange(len(raw)) for _ in range(args.lookups)]
+    raw_lookup = lookup_latency(raw, verse_ids)
+    rows = [(DATASET_FILE, f"{os.path.getsize(DATASET_FILE):,}", f"{raw_memory:,}",
+             f"{raw_lookup:.2f}", f"{raw_lookup:.2f}", f"{scan_throughput(raw):.1f}")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in COMPRESSION_CODECS:
+            path = os.path.join(directory, f"dataset-{codec}.bcz")
+            size = write_compressed_corpus(path, codec)
+            verses, memory = traced(lambda: CompressedVerses(CompressedCorpus(path)))
+            assert list(verses) == raw
+            cold = lookup_latency(verses, verse_ids, verses.corpus.block.cache_clear)
+            warm = lookup_latency(verses, verse_ids[:1] * len(verse_ids))
+            rows.append((f"{codec} chapter blocks", f"{size:,}", f"{memory:,}",
+                         f"{cold:.2f}", f"{warm:.2f}", f"{scan_throughput(verses):.1f}"))
+            verses.corpus.data.close()
+
+    display_stats_table(f"Corpus formats ({len(raw):,} verses, {args.lookups:,} lookups)",
+                        ["Format", "File bytes", "Text memory", "Lookup µs (cold)",
+                         "Lookup µs (warm)", "Scan MB/s"], rows)
+    bible_cli.console.print("Text memory for compressed formats excludes the memory-mapped file.")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,46 @@
 import json
 import os
+import sys
 import argparse
 import re
 import pickle
+import csv
+import shutil
+import subprocess
+import multiprocessing
+import threading
+import functools
+import contextlib
+import mmap
+import select
+import zlib
 from datetime import datetime
 import random
+import hashlib
+import time
+from bisect import bisect_left, bisect_right, insort
+from array import array
+from collections import Counter, deque
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+try:
+    import lzma
+except ImportError:  # Python built without liblzma
+    lzma = None
+try:
+    import termios
+    import tty
+except ImportError:  # Windows
+    termios = tty = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
 from rich.console import Console
 from rich.table import Table, box
 from rich.panel import Panel
@@ -16,22 +52,254 @@ from rich.spinner import Spinner
 from rich.prompt import Prompt
 from rapidfuzz import fuzz
 
+from bible_complete import METADATA_FILE, COMPLETION_SCRIPTS
+
 # Version information
 __version__ = "1.0.3"
 
 # Initialize Rich console
 console = Console()
 
-# Load JSON dataset
-with open("dataset.json") as f:
-    dataset = json.load(f)
+# Dataset and on-disk cache locations
+DATASET_FILE = "dataset.json"
+COMPRESSED_DATASET_FILE = "dataset.bcz"  # Used when dataset.json is absent
+CACHE_DIR = ".bible_cache"
+
+def iter_dataset_books(path=DATASET_FILE, chunk_size=1 << 16):
+    """Parse the dataset's top-level array one book object at a time.
+
+    Only the current book's JSON text is held in memory, so peak memory stays
+    close to the size of the parsed data rather than the file plus the data.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size)
+        position = 0
+        read_size = chunk_size
+        expect = "["
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position == len(buffer):
+                more = f.read(chunk_size)
+                if not more:
+                    raise ValueError(f"{path}: unexpected end of file")
+                buffer, position = more, 0
+                continue
+
+            char = buffer[position]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError(f"{path}: expected a list of books")
+                position += 1
+                expect = "book"
+                continue
+            if char == "]" and expect in ("book", "separator"):
+                return
+            if expect == "separator":
+                if char != ",":
+                    raise ValueError(f"{path}: expected ',' between books")
+                position += 1
+                expect = "book"
+                continue
+
+            try:
+                book, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The book continues past the buffer; read geometrically more
+                # so a large book is not re-parsed once per chunk
+                more = f.read(read_size)
+                if not more:
+                    raise
+                buffer = buffer[position:] + more
+                position = 0
+                read_size *= 2
+                continue
+            if not isinstance(book, dict):
+                raise ValueError(f"{path}: expected a book object")
+            yield book
+            buffer, position = buffer[end:], 0
+            read_size = chunk_size
+            expect = "separator"
+
+dataset = []
+book_lookup = {}  # Dictionary for fast book name lookup
+book_names = []
+book_index = {}
+
+# Flat verse store: a verse id is the verse's position in canonical order
+verse_refs = []  # (book index, chapter, verse) for each verse id
+verse_texts = []
+chapter_starts = []  # per book, the first verse id of each chapter plus an end sentinel
+
+def register_book(book):
+    """Add a book to the dataset and the book name lookups"""
+    dataset.append(book)
+    name = book["name"].lower()
+    book_lookup[name] = book
+    book_names.append(name)
+    book_index[name] = len(dataset) - 1
+
+def add_book(book):
+    """Add a parsed book to the dataset, lookups and verse store"""
+    book_idx = len(dataset)
+    starts = []
+    for chapter_idx, chapter in enumerate(book["chapters"], start=1):
+        starts.append(len(verse_texts))
+        for verse_idx, verse_text in enumerate(chapter, start=1):
+            verse_refs.append((book_idx, chapter_idx, verse_idx))
+            verse_texts.append(verse_text)
+    starts.append(len(verse_texts))
+    chapter_starts.append(starts)
+    register_book(book)
+
+COMPRESSED_MAGIC = b"BIBLECZ1"
+COMPRESSION_CODECS = {"zlib": zlib}
+if lzma:
+    COMPRESSION_CODECS["lzma"] = lzma
+BLOCK_CACHE_SIZE = 16  # Decompressed chapters kept in memory
+
+def write_compressed_corpus(path, codec="zlib"):
+    """Write the loaded corpus as independently compressed chapter blocks.
+
+    The file holds the magic bytes, the header length as 8 little-endian
+    bytes, a JSON header (codec, each book's name, abbreviation and verse
+    counts per chapter, and block offsets) and then the blocks. A block is
+    one chapter's verses, each ending in NUL. Returns the file size.
+    """
+    compress = COMPRESSION_CODECS[codec].compress
+    books, blocks, offsets = [], [], [0]
+    for book_idx, book in enumerate(dataset):
+        starts = chapter_starts[book_idx]
+        books.append({"name": book["name"], "abbrev": book.get("abbrev", ""),
+                      "verses": [end - start for start, end in zip(starts, starts[1:])]})
+        for start, end in zip(starts, starts[1:]):
+            text = "".join(verse_texts[verse_id] + "\0" for verse_id in range(start, end))
+            blocks.append(compress(text.encode("utf-8")))
+            offsets.append(offsets[-1] + len(blocks[-1]))
+    header = json.dumps({"codec": codec, "books": books, "blocks": offsets},
+                        separators=(",", ":")).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(COMPRESSED_MAGIC + len(header).to_bytes(8, "little") + header)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+class CompressedCorpus:
+    """A compressed corpus file whose chapter blocks are decompressed on demand.
+
+    The file is memory-mapped and the most recently used chapters are kept
+    in an LRU, so a lookup decompresses one chapter instead of the text.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic_size = len(COMPRESSED_MAGIC)
+        if self.data[:magic_size] != COMPRESSED_MAGIC:
+            raise ValueError(f"{path}: not a compressed corpus")
+        header_size = int.from_bytes(self.data[magic_size:magic_size + 8], "little")
+        self.base = magic_size + 8 + header_size
+        self.header = json.loads(self.data[magic_size + 8:self.base])
+        if self.header["codec"] not in COMPRESSION_CODECS:
+            raise ValueError(f"{path}: unsupported codec {self.header['codec']}")
+        self.decompress = COMPRESSION_CODECS[self.header["codec"]].decompress
+        self.offsets = self.header["blocks"]
+        # First verse id of each chapter block, plus an end sentinel
+        self.verse_starts = [0]
+        for book in self.header["books"]:
+            for count in book["verses"]:
+                self.verse_starts.append(self.verse_starts[-1] + count)
+        self.block = functools.lru_cache(maxsize=BLOCK_CACHE_SIZE)(self.read_block)
+
+    def read_block(self, block_idx):
+        """Decompress one chapter into a tuple of its verses"""
+        start = self.base + self.offsets[block_idx]
+        end = self.base + self.offsets[block_idx + 1]
+        return tuple(self.decompress(self.data[start:end]).decode("utf-8").split("\0")[:-1])
+
+class CompressedChapters(Sequence):
+    """A book's chapters in a compressed corpus, each read when accessed"""
+
+    def __init__(self, corpus, first_block, count):
+        self.corpus = corpus
+        self.blocks = range(first_block, first_block + count)
+
+    def __len__(self):
+        return len(self.blocks)
 
-# Dictionary for fast book name lookup
-book_lookup = {item["name"].lower(): item for item in dataset}
-book_names = list(book_lookup.keys())
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.corpus.block(block_idx) for block_idx in self.blocks[index]]
+        return self.corpus.block(self.blocks[index])
+
+class CompressedVerses(Sequence):
+    """Verse texts by verse id, read from a compressed corpus's chapter blocks"""
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.starts = corpus.verse_starts
+
+    def __len__(self):
+        return self.starts[-1]
+
+    def __getitem__(self, verse_id):
+        if isinstance(verse_id, slice):
+            return [self[i] for i in range(*verse_id.indices(len(self)))]
+        verse_id = range(len(self))[verse_id]
+        block_idx = bisect_right(self.starts, verse_id) - 1
+        return self.corpus.block(block_idx)[verse_id - self.starts[block_idx]]
+
+    def __iter__(self):
+        # Full scans decompress each chapter once and leave the LRU alone
+        for block_idx in range(len(self.starts) - 1):
+            yield from self.corpus.read_block(block_idx)
+
+def load_compressed_corpus(path):
+    """Load a compressed corpus; verse texts stay compressed until read"""
+    global verse_texts
+    corpus = CompressedCorpus(path)
+    block_idx = 0
+    for book_idx, entry in enumerate(corpus.header["books"]):
+        starts = [corpus.verse_starts[block_idx + chapter] for chapter in range(len(entry["verses"]) + 1)]
+        for chapter, count in enumerate(entry["verses"], start=1):
+            verse_refs.extend((book_idx, chapter, verse) for verse in range(1, count + 1))
+        chapter_starts.append(starts)
+        register_book({"name": entry["name"], "abbrev": entry["abbrev"],
+                       "chapters": CompressedChapters(corpus, block_idx, len(entry["verses"]))})
+        block_idx += len(entry["verses"])
+    verse_texts = CompressedVerses(corpus)
+
+def default_corpus_file():
+    """dataset.json, or the compressed corpus if only that is installed"""
+    if not os.path.exists(DATASET_FILE) and os.path.exists(COMPRESSED_DATASET_FILE):
+        return COMPRESSED_DATASET_FILE
+    return DATASET_FILE
+
+corpus_file = default_corpus_file()  # The file the corpus was loaded from
+
+def load_corpus(path=corpus_file):
+    """Load the dataset book by book into the verse store.
+
+    Loading finishes before the first query runs; streaming only keeps the
+    JSON text of one book in memory at a time.
+    """
+    with open(path, "rb") as f:
+        compressed = f.read(len(COMPRESSED_MAGIC)) == COMPRESSED_MAGIC
+    if compressed:
+        load_compressed_corpus(path)
+        return
+    for book in iter_dataset_books(path):
+        add_book(book)
+
+# Load JSON dataset
+load_corpus()
 
 # Get terminal width
-terminal_length = os.get_terminal_size()[0] - os.get_terminal_size()[0] // 3
+terminal_length = shutil.get_terminal_size()[0] - shutil.get_terminal_size()[0] // 3
 
 def create_table():
     """Create a new Rich table with consistent styling"""
@@ -50,18 +318,101 @@ def convert_brackets(text):
 
 def display_verses(verses, title=None):
     """Display verses using Rich table"""
+    display_rows([(reference, format_text(convert_brackets(text))) for reference, text in verses], title)
+
+def display_rows(rows, title=None):
+    """Display (reference, already formatted text) rows using Rich table"""
     table = Table(show_header=True, header_style="bold blue", show_lines=True, box=box.ROUNDED)
     table.add_column("Scripture", style="cyan", width=15)
     table.add_column("Text", style="white", width=terminal_length)
     
-    for reference, text in verses:
-        table.add_row(reference, format_text(convert_brackets(text)))
+    for reference, text in rows:
+        table.add_row(reference, text)
     
     if title:
         console.print(f"\n[bold blue]{title}[/bold blue]")
     console.print(table)
 
+class PassageReader:
+    """Pages through a range of verse ids that may cross chapter boundaries.
+
+    Pages are formatted for the terminal on a background thread, so the next
+    page is usually ready before it is asked for, and pages already seen are
+    kept for paging back.
+    """
+
+    def __init__(self, start, end, page_size=10):
+        self.start = start
+        self.end = end
+        self.page_size = page_size
+        self.page_count = max(1, -(-(end - start) // page_size))
+        self.pages = {}
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def page_range(self, page):
+        """Verse ids shown on a page"""
+        first = self.start + page * self.page_size
+        return range(first, min(first + self.page_size, self.end))
+
+    def render_page(self, page):
+        return [(format_verse_reference(verse_id), format_text(convert_brackets(verse_texts[verse_id])))
+                for verse_id in self.page_range(page)]
+
+    def prefetch(self, page):
+        """Start formatting a page in the background"""
+        if 0 <= page < self.page_count and page not in self.pages:
+            self.pages[page] = self.executor.submit(self.render_page, page)
+
+    def page(self, page):
+        """Formatted (reference, text) rows of a page"""
+        self.prefetch(page)
+        return self.pages[page].result()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+def read_passage(start, end, page_size=10):
+    """Read a range of verses page by page, across chapter boundaries"""
+    reader = PassageReader(start, end, page_size)
+    page = 0
+    try:
+        while True:
+            rows = reader.page(page)
+            reader.prefetch(page + 1)
+            display_rows(rows)
+            last_verse = reader.page_range(page)[-1]
+            if page + 1 < reader.page_count:
+                console.print(f"[yellow](Page {page + 1}/{reader.page_count}: press Enter for next page, 'p' for previous, "
+                              f"'b' to bookmark current verse or 'q' to quit)[/yellow]")
+            else:
+                console.print("[yellow](End of passage: press 'p' for previous page, 'b' to bookmark current verse "
+                              "or any key to exit)[/yellow]")
+            user_input = console.input("> ").strip().lower()
+            if user_input == "p":
+                page = max(0, page - 1)
+            elif user_input == "b":
+                note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
+                save_bookmark(format_verse_reference(last_verse), note)
+            elif user_input == "q" or page + 1 == reader.page_count:
+                console.print("[green]Exiting pagination...[/green]")
+                return
+            else:
+                page += 1
+    finally:
+        reader.close()
+
+def display_search(keyword, options=None, use_cache=True):
+    """Run an advanced search and display its results"""
+    try:
+        results = advanced_search(keyword, options, use_cache)
+    except ValueError as error:
+        console.print(f"[red]Error: {error}[/red]")
+        return
+    display_search_results(results, keyword)
+
 def display_search_results(results, keyword):
+    if getattr(results, "truncated", False):
+        console.print(f"[yellow]The search took too long and was stopped; only the first matches are shown.[/yellow]")
     if not results:
         console.print(f"[red]No results found for '{keyword}'.[/red]")
         return
@@ -87,163 +438,80 @@ def display_search_results(results, keyword):
     if table.row_count > 0:
         console.print(table)
 
-def display_bookmarks():
-    bookmarks = load_bookmarks()
-    if not bookmarks:
-        console.print(f"[yellow]No bookmarks found.[/yellow]")
-        return
-    
-    console.print("\n[bold blue]Your Bookmarks:[/bold blue]")
-    table = Table(show_header=True, header_style="bold blue", show_lines=True, box=box.ROUNDED)
-    table.add_column("Scripture", style="cyan", width=15)
-    table.add_column("Note", style="white", width=terminal_length)
-    
-    for ref, data in bookmarks.items():
-        timestamp = datetime.fromisoformat(data["timestamp"]).strftime("%Y-%m-%d %H:%M")
-        note = data["note"] if data["note"] else "No note"
-        table.add_row(f"{ref} ({timestamp})", note)
-    
-    console.print(table)
+def display_bookmarks(page_size=20, **filters):
+    """Display bookmarks in canonical order, a page at a time"""
+    page = 1
+    while True:
+        entries, total = query_bookmarks(page=page, page_size=page_size, **filters)
+        if not total:
+            console.print(f"[yellow]No bookmarks found.[/yellow]")
+            return
+        
+        console.print("\n[bold blue]Your Bookmarks:[/bold blue]")
+        table = Table(show_header=True, header_style="bold blue", show_lines=True, box=box.ROUNDED)
+        table.add_column("Scripture", style="cyan", width=15)
+        table.add_column("Note", style="white", width=terminal_length)
+        
+        for ref, data in entries:
+            timestamp = datetime.fromisoformat(data["timestamp"]).strftime("%Y-%m-%d %H:%M")
+            note = data["note"] if data["note"] else "No note"
+            if data.get("tags"):
+                note += f"\n[magenta]#{' #'.join(data['tags'])}[/magenta]"
+            table.add_row(f"{ref} ({timestamp})", note)
+        
+        console.print(table)
+        pages = -(-total // page_size)
+        if page >= pages:
+            return
+        console.print(f"[yellow](Page {page}/{pages}: press Enter to continue or 'q' to quit pagination)[/yellow]")
+        if console.input("> ").strip().lower() == "q":
+            console.print("[green]Exiting pagination...[/green]")
+            return
+        page += 1
 
 def process_scripture(scripture_input):
-    # First try to match book-only pattern (now handles I, II, III, 1, 2, 3 prefixes)
-    book_only_match = re.match(r"^(?:(?:I|II|III|[123])\s+)?\D+$", scripture_input)
-    if book_only_match:
-        book = book_only_match.group(0)
-        result = lookup(book, 1, 1)  # Start from first chapter and verse
-        if result:
-            book_name, chapter, start_verse, verses = result
-            # Get all verses from the first chapter
-            chapter_data = book_lookup[book_name.lower()]["chapters"][0]
-            
-            # Display verses with pagination
-            console.print(f"\n[bold blue]Verses from {book_name} Chapter 1:[/bold blue]")
-            console.print(f"[yellow]Total verses: {len(chapter_data)}[/yellow]")
-            
-            # Handle chapters with fewer than 10 verses
-            if len(chapter_data) <= 10:
-                verses_to_display = [(f"{book_name} 1:{idx}", text) 
-                                   for idx, text in enumerate(chapter_data, start=1)]
-                display_verses(verses_to_display)
-                console.print("[yellow](Press 'b' to bookmark current verse or any key to exit)[/yellow]")
-                user_input = console.input("> ").strip().lower()
-                if user_input == "b":
-                    note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
-                    save_bookmark(f"{book_name} 1:{len(chapter_data)}", note)
-            else:
-                # Handle chapters with more than 10 verses
-                current_verses = []
-                for idx, verse_text in enumerate(chapter_data, start=1):
-                    current_verses.append((f"{book_name} 1:{idx}", verse_text))
-                    if idx % 10 == 0:  # Show 10 verses per page
-                        display_verses(current_verses)
-                        current_verses = []
-                        console.print("[yellow](Press Enter to continue, 'q' to quit, or 'b' to bookmark current verse)[/yellow]")
-                        user_input = console.input("> ").strip().lower()
-                        if user_input == "q":
-                            console.print("[green]Exiting pagination...[/green]")
-                            return
-                        elif user_input == "b":
-                            note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
-                            save_bookmark(f"{book_name} 1:{idx}", note)
-                            console.print("[yellow](Press Enter to continue or 'q' to quit pagination)[/yellow]")
-                            if console.input("> ").strip().lower() == "q":
-                                console.print("[green]Exiting pagination...[/green]")
-                                return
-                
-                # Display any remaining verses
-                if current_verses:
-                    display_verses(current_verses)
-                    console.print("[yellow](Press 'b' to bookmark current verse or any key to exit)[/yellow]")
-                    user_input = console.input("> ").strip().lower()
-                    if user_input == "b":
-                        note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
-                        save_bookmark(f"{book_name} 1:{len(chapter_data)}", note)
+    # References with a verse in a single chapter are shown with context; books,
+    # chapters and ranges across chapters open the continuous reader
+    match = REFERENCE_PATTERN.match(scripture_input.strip())
+    if not match:
+        console.print("[red]Error: Invalid scripture format. Use 'Book', 'Book Chapter', 'Book Chapter-Chapter', "
+                      "'Book Chapter:Verse', 'Book Chapter:Verse-Verse' or 'Book Chapter:Verse-Chapter:Verse'[/red]")
         return
 
-    # Then try to match book and chapter pattern
-    book_chapter_match = re.match(r"^((?:(?:I|II|III|[123])\s+)?\D+)\s+(\d+)$", scripture_input)
-    if book_chapter_match:
-        book, chapter = book_chapter_match.groups()
-        result = lookup(book, chapter, 1)  # Start from first verse of the chapter
-        if result:
-            book_name, chapter, start_verse, verses = result
-            # Get all verses from the specified chapter
-            chapter_data = book_lookup[book_name.lower()]["chapters"][int(chapter) - 1]
-            
-            # Display verses with pagination
-            console.print(f"\n[bold blue]Verses from {book_name} Chapter {chapter}:[/bold blue]")
-            console.print(f"[yellow]Total verses: {len(chapter_data)}[/yellow]")
-            
-            # Handle chapters with fewer than 10 verses
-            if len(chapter_data) <= 10:
-                verses_to_display = [(f"{book_name} {chapter}:{idx}", text) 
-                                   for idx, text in enumerate(chapter_data, start=1)]
-                display_verses(verses_to_display)
-                console.print("[yellow](Press 'b' to bookmark current verse or any key to exit)[/yellow]")
-                user_input = console.input("> ").strip().lower()
-                if user_input == "b":
-                    note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
-                    save_bookmark(f"{book_name} {chapter}:{len(chapter_data)}", note)
-            else:
-                # Handle chapters with more than 10 verses
-                current_verses = []
-                for idx, verse_text in enumerate(chapter_data, start=1):
-                    current_verses.append((f"{book_name} {chapter}:{idx}", verse_text))
-                    if idx % 10 == 0:  # Show 10 verses per page
-                        display_verses(current_verses)
-                        current_verses = []
-                        console.print("[yellow](Press Enter to continue, 'q' to quit, or 'b' to bookmark current verse)[/yellow]")
-                        user_input = console.input("> ").strip().lower()
-                        if user_input == "q":
-                            console.print("[green]Exiting pagination...[/green]")
-                            return
-                        elif user_input == "b":
-                            note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
-                            save_bookmark(f"{book_name} {chapter}:{idx}", note)
-                            console.print("[yellow](Press Enter to continue or 'q' to quit pagination)[/yellow]")
-                            if console.input("> ").strip().lower() == "q":
-                                console.print("[green]Exiting pagination...[/green]")
-                                return
-                
-                # Display any remaining verses
-                if current_verses:
-                    display_verses(current_verses)
-                    console.print("[yellow](Press 'b' to bookmark current verse or any key to exit)[/yellow]")
-                    user_input = console.input("> ").strip().lower()
-                    if user_input == "b":
-                        note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
-                        save_bookmark(f"{book_name} {chapter}:{len(chapter_data)}", note)
+    book, chapter, verse, range_end, range_end_verse = match.groups()
+    if not verse or range_end_verse:
+        passage = parse_reference_range(scripture_input)
+        if passage:
+            start, end = passage
+            if chapter and not range_end:
+                end = chapter_starts[verse_refs[start][0]][-1]  # Keep reading to the end of the book
+            console.print(f"\n[bold blue]Verses from {format_reference_range(start, end)}:[/bold blue]")
+            console.print(f"[yellow]Total verses: {end - start}[/yellow]")
+            read_passage(start, end)
         return
 
-    # Then try to match chapter:verse pattern
-    match = re.match(r"^((?:(?:I|II|III|[123])\s+)?\D+)\s+(\d+):(\d+)(?:-(\d+))?", scripture_input)
-    if match:
-        book, chapter, verse, end_verse = match.groups()
-        result = lookup(book, chapter, verse, end_verse)
-        if result:
-            book_name, chapter, start_verse, verses = result
-            verses_to_display = [(f"{book_name} {chapter}:{idx}", text) 
-                               for idx, text in enumerate(verses, start=start_verse)]
-            display_verses(verses_to_display)
-            
-            # Add option to view context
-            console.print("\n[yellow]Would you like to see the context? (yes/no): [/yellow]")
-            if console.input("> ").strip().lower() in ["yes", "y"]:
-                context = get_verse_context(book_name, chapter, start_verse)
-                if context:
-                    console.print("\n[bold blue]Context:[/bold blue]")
-                    context_verses = [(f"{book_name} {chapter}:{verse_num}", text) 
-                                    for verse_num, text in context]
-                    display_verses(context_verses)
-            
-            # Add option to bookmark
-            console.print("\n[yellow]Would you like to bookmark this verse? (yes/no): [/yellow]")
-            if console.input("> ").strip().lower() in ["yes", "y"]:
-                note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
-                save_bookmark(f"{book_name} {chapter}:{start_verse}", note)
-    else:
-        console.print("[red]Error: Invalid scripture format. Use 'Book', 'Book Chapter', or 'Book Chapter:Verse' or 'Book Chapter:Verse-Verse'[/red]")
+    result = lookup(book, chapter, verse, range_end)
+    if result:
+        book_name, chapter, start_verse, verses = result
+        verses_to_display = [(f"{book_name} {chapter}:{idx}", text) 
+                           for idx, text in enumerate(verses, start=start_verse)]
+        display_verses(verses_to_display)
+        
+        # Add option to view context
+        console.print("\n[yellow]Would you like to see the context? (yes/no): [/yellow]")
+        if console.input("> ").strip().lower() in ["yes", "y"]:
+            context = get_verse_context(book_name, chapter, start_verse, cross_chapters=True)
+            if context:
+                console.print("\n[bold blue]Context:[/bold blue]")
+                context_verses = [(f"{book_name} {chapter_num}:{verse_num}", text) 
+                                for chapter_num, verse_num, text in context]
+                display_verses(context_verses)
+        
+        # Add option to bookmark
+        console.print("\n[yellow]Would you like to bookmark this verse? (yes/no): [/yellow]")
+        if console.input("> ").strip().lower() in ["yes", "y"]:
+            note = console.input("[yellow]Add a note (optional): [/yellow]").strip()
+            save_bookmark(f"{book_name} {chapter}:{start_verse}", note)
 
 def main_menu():
     title_ascii = r"""
@@ -255,6 +523,14 @@ def main_menu():
 |______/ (_____)|______/ |_______)|_______)   \______)|_______)(_____)
     """
 
+    # Warm up while the user reads the menu; loaders are thread-safe, so a
+    # query made before this finishes waits for the index being built
+    warm_up = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warm-up")
+    today = datetime.now().date()
+    daily_verse = warm_up.submit(daily_verse_rows, today)
+    warm_up.submit(warm_up_indexes)
+    warm_up.shutdown(wait=False)
+
     while True:
         console.print(f"\n[bold blue]Welcome to[/bold blue]")
         console.print(f"[bold blue]{title_ascii}[/bold blue]")
@@ -264,6 +540,7 @@ def main_menu():
         console.print("4. Get Daily Verse")
         console.print("5. Advanced Search")
         console.print("6. Exit")
+        console.print("7. Live Search")
         choice = console.input(f"\n[yellow]Enter your choice: [/yellow]").strip()
 
         if choice == "1":
@@ -272,14 +549,16 @@ def main_menu():
         elif choice == "2":
             keyword = console.input("[yellow]Enter keyword to search: [/yellow]").strip()
             use_regex = console.input("[yellow]Enable regex search? (yes/no): [/yellow]").strip().lower() in ["yes", "y"]
-            results = search_keyword(keyword, use_regex)
-            display_search_results(results, keyword)
+            display_search(keyword, {"regex": use_regex})
         elif choice == "3":
             display_bookmarks()
         elif choice == "4":
-            verse = get_daily_verse()
+            if datetime.now().date() != today:  # The menu was left open past midnight
+                today = datetime.now().date()
+                daily_verse = None
+            rows = daily_verse.result() if daily_verse else daily_verse_rows(today)
             console.print(f"\n[bold blue]Today's Verse:[/bold blue]")
-            display_verses([(f"{verse[0]} {verse[1]}:{verse[2]}", verse[3])])
+            display_rows(rows)
         elif choice == "5":
             console.print(f"\n[bold blue]Advanced Search Options:[/bold blue]")
             keyword = console.input("[yellow]Enter keyword to search: [/yellow]").strip()
@@ -299,60 +578,199 @@ def main_menu():
             if max_words.isdigit():
                 options["max_words"] = int(max_words)
             
-            results = advanced_search(keyword, options)
-            display_search_results(results, keyword)
+            display_search(keyword, options)
         elif choice == "6":
             console.print("[green]Thank you for using Bible CLI. Goodbye![/green]")
             break
+        elif choice == "7":
+            live_search()
         else:
             console.print("[red]Invalid choice. Please try again.[/red]")
 
+BOOKMARKS_FILE = "bookmarks.pkl"
+BOOKMARK_INDEX_FILE = "bookmarks_index.pkl"
+
 def load_bookmarks():
     try:
-        with open("bookmarks.pkl", "rb") as f:
+        with open(BOOKMARKS_FILE, "rb") as f:
             return pickle.load(f)
     except FileNotFoundError:
         return {}
 
-def save_bookmark(reference, note=""):
+def save_bookmark(reference, note="", tags=None):
     bookmarks = load_bookmarks()
+    index = load_bookmark_index(bookmarks)
+    if reference in bookmarks:
+        unindex_bookmark(index, reference, bookmarks[reference])
     bookmarks[reference] = {
         "timestamp": datetime.now().isoformat(),
         "note": note
     }
-    with open("bookmarks.pkl", "wb") as f:
+    if tags:
+        bookmarks[reference]["tags"] = sorted({tag.strip().lower() for tag in tags if tag.strip()})
+    index_bookmark(index, reference, bookmarks[reference])
+    with open(BOOKMARKS_FILE, "wb") as f:
         pickle.dump(bookmarks, f)
+    save_bookmark_index(index)
     console.print(f"[green]Bookmark saved successfully![/green]")
 
-def get_daily_verse():
-    today = datetime.now().date()
+def bookmarks_stamp():
+    """Modification time and size of the bookmarks file, to detect stale indexes"""
+    try:
+        stat = os.stat(BOOKMARKS_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def bookmark_verse_id(reference):
+    """Verse id a bookmark sorts by; unparseable references sort last"""
+    passage = parse_reference_range(reference, non_interactive=True)
+    return passage[0] if passage else len(verse_texts)
+
+def index_bookmark(index, reference, data, bulk=False):
+    """Add a bookmark to the secondary indexes"""
+    verse_id = bookmark_verse_id(reference)
+    index["verse_of"][reference] = verse_id
+    if bulk:
+        index["verses"].append((verse_id, reference))
+        index["dates"].append((data["timestamp"], reference))
+    else:
+        insort(index["verses"], (verse_id, reference))
+        insort(index["dates"], (data["timestamp"], reference))
+    for tag in data.get("tags", ()):
+        index["tags"].setdefault(tag, set()).add(reference)
+    for word in set(tokenize(data.get("note") or "")):
+        index["words"].setdefault(word, set()).add(reference)
+
+def unindex_bookmark(index, reference, data):
+    """Remove a bookmark from the secondary indexes"""
+    verse_id = index["verse_of"].pop(reference, None)
+    for key, entry in (("verses", (verse_id, reference)), ("dates", (data["timestamp"], reference))):
+        position = bisect_left(index[key], entry)
+        if position < len(index[key]) and index[key][position] == entry:
+            del index[key][position]
+    for tag in data.get("tags", ()):
+        index["tags"].get(tag, set()).discard(reference)
+    for word in set(tokenize(data.get("note") or "")):
+        index["words"].get(word, set()).discard(reference)
+
+def build_bookmark_index(bookmarks):
+    """Index bookmarks by verse, tag, note word and date"""
+    index = {"source": None, "verse_of": {}, "verses": [], "dates": [], "tags": {}, "words": {}}
+    for reference, data in bookmarks.items():
+        index_bookmark(index, reference, data, bulk=True)
+    index["verses"].sort()
+    index["dates"].sort()
+    return index
+
+def save_bookmark_index(index):
+    index["source"] = bookmarks_stamp()
+    try:
+        with open(BOOKMARK_INDEX_FILE, "wb") as f:
+            pickle.dump(index, f)
+    except OSError:
+        pass  # The index is rebuilt from the bookmarks when missing
+
+def load_bookmark_index(bookmarks=None):
+    """Load the bookmark index, rebuilding it if the bookmarks file changed"""
+    try:
+        with open(BOOKMARK_INDEX_FILE, "rb") as f:
+            index = pickle.load(f)
+        if index.get("source") == bookmarks_stamp():
+            return index
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    index = build_bookmark_index(load_bookmarks() if bookmarks is None else bookmarks)
+    save_bookmark_index(index)
+    return index
+
+def query_bookmarks(reference=None, tag=None, text=None, since=None, until=None, page=1, page_size=20):
+    """Find bookmarks in canonical Bible order.
+
+    Filters combine with AND: reference is a book or range, tag an exact tag,
+    text words that must all appear in the note, and since/until ISO dates
+    (inclusive). Returns (one page of (reference, data) pairs, total matches).
+    """
+    index = load_bookmark_index()
+    candidates = []
+    if reference:
+        passage = parse_reference_range(reference, non_interactive=True)
+        if not passage:
+            return [], 0
+        low = bisect_left(index["verses"], (passage[0],))
+        high = bisect_left(index["verses"], (passage[1],))
+        candidates.append({ref for _, ref in index["verses"][low:high]})
+    if tag:
+        candidates.append(index["tags"].get(tag.strip().lower(), set()))
+    if text:
+        for word in tokenize(text):
+            candidates.append(index["words"].get(word, set()))
+    if since or until:
+        low = bisect_left(index["dates"], (since,)) if since else 0
+        high = bisect_right(index["dates"], (until + "\uffff",)) if until else len(index["dates"])
+        candidates.append({ref for _, ref in index["dates"][low:high]})
+
+    start = (max(page, 1) - 1) * page_size
+    if candidates:
+        candidates.sort(key=len)
+        matches = set(candidates[0]).intersection(*candidates[1:])
+        ordered = sorted((index["verse_of"][ref], ref) for ref in matches)
+    else:
+        ordered = index["verses"]
+    total = len(ordered)
+
+    bookmarks = load_bookmarks()
+    return [(ref, bookmarks[ref]) for _, ref in ordered[start:start + page_size]], total
+
+def get_daily_verse(today=None):
+    if today is None:
+        today = datetime.now().date()
     seed = int(today.strftime("%Y%m%d"))
-    random.seed(seed)
-    book = random.choice(dataset)
-    chapter = random.choice(book["chapters"])
-    verse_idx = random.randint(0, len(chapter) - 1)
-    return (book["name"], book["chapters"].index(chapter) + 1, 
-            verse_idx + 1, chapter[verse_idx])
+    rng = random.Random(seed)  # Not the shared generator, so threads can call this
+    book = rng.choice(dataset)
+    chapter_idx = rng.randrange(len(book["chapters"]))  # Same draw as rng.choice
+    chapter = book["chapters"][chapter_idx]
+    verse_idx = rng.randint(0, len(chapter) - 1)
+    return (book["name"], chapter_idx + 1, verse_idx + 1, chapter[verse_idx])
+
+def daily_verse_rows(today=None):
+    """The daily verse as a display row, already wrapped to the terminal"""
+    book, chapter, verse, text = get_daily_verse(today)
+    return [(f"{book} {chapter}:{verse}", format_text(convert_brackets(text)))]
+
+def warm_up_indexes():
+    """Build the indexes that the first search from the menu would wait for.
+
+    The compressed corpus skips the corpus blob, a lowercased copy of the
+    whole text, so it is only decompressed into memory by a search.
+    """
+    if not isinstance(verse_texts, CompressedVerses):
+        load_corpus_blob()  # Keyword and advanced search
+    load_word_counts()
+    load_term_matrix()  # Live search completions
 
 def search_keyword(keyword, is_regex=False):
-    results = []
-    pattern = re.compile(keyword, re.IGNORECASE) if is_regex else None
-
-    for book in dataset:
-        for chapter_idx, chapter in enumerate(book["chapters"], start=1):
-            for verse_idx, verse_text in enumerate(chapter, start=1):
-                if is_regex and pattern.search(verse_text):
-                    highlighted_text = pattern.sub(f"[yellow]{pattern.pattern}[/yellow]", verse_text)
-                    results.append((book["name"], chapter_idx, verse_idx, highlighted_text))
-                elif not is_regex and keyword.lower() in verse_text.lower():
-                    highlighted_text = re.sub(
-                        re.escape(keyword), f"[yellow]{keyword}[/yellow]", verse_text, flags=re.IGNORECASE
-                    )
-                    results.append((book["name"], chapter_idx, verse_idx, highlighted_text))
-    return results
+    return advanced_search(keyword, {"regex": is_regex})
+
+def get_verse_context(book, chapter, verse, context_lines=2, cross_chapters=False):
+    """Show verses before and after the target verse
+
+    With cross_chapters the context can run into the neighbouring chapters of
+    the book, and each entry is (chapter, verse, text) instead of (verse, text).
+    """
+    if cross_chapters:
+        try:
+            starts = chapter_starts[book_index[book.lower()]]
+            chapter, verse = int(chapter), int(verse)
+            if chapter < 1 or verse < 1 or verse > starts[chapter] - starts[chapter - 1]:
+                return None
+        except (ValueError, IndexError, KeyError):
+            return None
+        verse_id = starts[chapter - 1] + verse - 1
+        start = max(starts[0], verse_id - context_lines)
+        end = min(starts[-1], verse_id + context_lines + 1)
+        return [verse_refs[i][1:] + (verse_texts[i],) for i in range(start, end)]
 
-def get_verse_context(book, chapter, verse, context_lines=2):
-    """Show verses before and after the target verse"""
     try:
         book_data = book_lookup[book.lower()]
         chapter_idx = int(chapter) - 1
@@ -371,59 +789,700 @@ def get_verse_context(book, chapter, verse, context_lines=2):
     except (ValueError, IndexError):
         return None
 
-def advanced_search(keyword, options=None):
-    """Enhanced search with additional filters"""
+NEW_TESTAMENT_BOOKS = {
+    "Matthew", "Mark", "Luke", "John", "Acts", "Romans", "1 Corinthians",
+    "2 Corinthians", "Galatians", "Ephesians", "Philippians", "Colossians",
+    "1 Thessalonians", "2 Thessalonians", "1 Timothy", "2 Timothy", "Titus",
+    "Philemon", "Hebrews", "James", "1 Peter", "2 Peter", "1 John",
+    "2 John", "3 John", "Jude", "Revelation"
+}
+
+def thread_safe_loader(load):
+    """Let one thread at a time run a lazy loader.
+
+    A caller that arrives while another thread (such as the menu's warm-up)
+    is building the value waits for it and gets the same object back.
+    """
+    lock = threading.RLock()
+
+    @functools.wraps(load)
+    def locked_load(*args, **kwargs):
+        with lock:
+            return load(*args, **kwargs)
+    return locked_load
+
+@thread_safe_loader
+def load_corpus_blob():
+    """All verse texts lowercased into one string, plus each verse's offset.
+
+    Verses are separated by NUL so a match never spans two verses; the text
+    of verse i is blob[offsets[i]:offsets[i + 1] - 1].
+    """
+    global _corpus_blob
+    if _corpus_blob is None:
+        folded = [verse_text.lower() for verse_text in verse_texts]
+        offsets = [0]
+        for verse_text in folded:
+            offsets.append(offsets[-1] + len(verse_text) + 1)
+        _corpus_blob = ("\0".join(folded) + "\0", offsets)
+    return _corpus_blob
+
+_corpus_blob = None
+
+def find_substring_ids(keyword, start=0, end=None):
+    """Ids of the verses in [start, end) containing keyword, ignoring case"""
+    if end is None:
+        end = len(verse_texts)
+    keyword = keyword.lower()
+    if not keyword:
+        return list(range(start, end))
+    if "\0" in keyword:
+        return []
+
+    blob, offsets = load_corpus_blob()
+    verse_ids = []
+    limit = offsets[end]
+    position = blob.find(keyword, offsets[start], limit)
+    verse_id = start
+    while position != -1:
+        verse_id = bisect_right(offsets, position, verse_id) - 1
+        verse_ids.append(verse_id)
+        position = blob.find(keyword, offsets[verse_id + 1], limit)
+    return verse_ids
+
+def build_keyword_automaton(keywords):
+    """Aho-Corasick automaton over lowercase keywords, as a DFA.
+
+    Returns (transitions, outputs): transitions[state] maps a character to the
+    next state (missing characters go back to the root, state 0) and
+    outputs[state] lists the indexes of the keywords ending there.
+    """
+    trie, outputs = [{}], [[]]
+    for keyword_idx, keyword in enumerate(keywords):
+        state = 0
+        for char in keyword:
+            if char not in trie[state]:
+                trie[state][char] = len(trie)
+                trie.append({})
+                outputs.append([])
+            state = trie[state][char]
+        outputs[state].append(keyword_idx)
+
+    # Breadth-first, so each state's failure state is complete before its children
+    failure = [0] * len(trie)
+    transitions = [None] * len(trie)
+    transitions[0] = dict(trie[0])
+    queue = deque(trie[0].values())
+    while queue:
+        state = queue.popleft()
+        fallback = failure[state]
+        transitions[state] = {**transitions[fallback], **trie[state]}
+        outputs[state] = outputs[state] + outputs[fallback]
+        for char, child in trie[state].items():
+            failure[child] = transitions[fallback].get(char, 0) if state else 0
+            queue.append(child)
+    return transitions, outputs
+
+# Below this many keywords, one str.find scan per keyword beats the automaton
+MULTI_SEARCH_AUTOMATON_THRESHOLD = 64
+
+def find_keywords_ids(keywords, ranges=None):
+    """Ids of the verses containing each keyword, ignoring case.
+
+    ranges is a list of (start, end) verse id spans to search (default: the
+    whole corpus). Returns one sorted id list per keyword. Large keyword
+    sets are matched together in a single pass with an Aho-Corasick automaton.
+    """
+    if ranges is None:
+        ranges = [(0, len(verse_texts))]
+    keywords = [keyword.lower() for keyword in keywords]
+    if len(keywords) < MULTI_SEARCH_AUTOMATON_THRESHOLD or not all(keywords):
+        return [[verse_id for start, end in ranges for verse_id in find_substring_ids(keyword, start, end)]
+                for keyword in keywords]
+
+    transitions, outputs = build_keyword_automaton(keywords)
+    blob, offsets = load_corpus_blob()
+    hits = [[] for _ in keywords]
+    for start, end in ranges:
+        state = 0
+        verse_id = start
+        for position, char in enumerate(blob[offsets[start]:offsets[end]], offsets[start]):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                verse_id = bisect_right(offsets, position, verse_id) - 1
+                for keyword_idx in outputs[state]:
+                    keyword_hits = hits[keyword_idx]
+                    if not keyword_hits or keyword_hits[-1] != verse_id:
+                        keyword_hits.append(verse_id)
+    return hits
+
+def search_keywords(keywords, options=None):
+    """Search for many keywords at once.
+
+    Supports the testament, min_words and max_words options of
+    advanced_search and returns {keyword: results}.
+    """
     if options is None:
         options = {}
-    
-    results = []
-    pattern = re.compile(keyword, re.IGNORECASE) if options.get("regex", False) else None
-    
-    for book in dataset:
+    keywords = list(dict.fromkeys(keyword.strip() for keyword in keywords if keyword.strip()))
+    ranges = None
+    if options.get("testament"):
+        ranges = []
+        for start, end in field_ranges("testament", options["testament"]):
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+
+    results = {}
+    for keyword, verse_ids in zip(keywords, find_keywords_ids(keywords, ranges)):
+        keyword_ids = []
+        for verse_id in verse_ids:
+            word_count = len(verse_texts[verse_id].split())
+            if options.get("min_words") and word_count < options["min_words"]:
+                continue
+            if options.get("max_words") and word_count > options["max_words"]:
+                continue
+            keyword_ids.append(verse_id)
+        results[keyword] = SearchResults(keyword_ids, search_pattern(keyword))
+    return results
+
+def read_keyword_file(path):
+    """Keywords from a file, one per line; blank lines and # comments are skipped"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+REGEX_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+REGEX_TIME_BUDGET = 2.0  # Seconds a regex search may run
+REGEX_VERSE_BUDGET = None  # Verses a regex search may scan, None for no limit
+REGEX_BATCH_SIZE = 500  # Verses the worker scans between sending matches
+
+def regex_min_width(items):
+    """Fewest characters a parsed regex can match"""
+    width = 0
+    for op, av in items:
+        if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN):
+            width += 1
+        elif op in REGEX_REPEATS or op == getattr(sre_parse, "POSSESSIVE_REPEAT", None):
+            width += av[0] * regex_min_width(av[2])
+        elif op == sre_parse.SUBPATTERN:
+            width += regex_min_width(av[-1])
+        elif op == sre_parse.BRANCH:
+            width += min(regex_min_width(branch) for branch in av[1])
+    return width
+
+def regex_covering_repeat(items):
+    """A repeat that can match everything items matches, e.g. a+ in (a+b?)"""
+    items = list(items)
+    for index, (op, av) in enumerate(items):
+        if regex_min_width(items[:index] + items[index + 1:]):
+            continue
+        if op in REGEX_REPEATS and av[1] > 1:
+            return av
+        if op == sre_parse.SUBPATTERN:
+            repeat = regex_covering_repeat(av[-1])
+        elif op == sre_parse.BRANCH:
+            repeat = next(filter(None, map(regex_covering_repeat, av[1])), None)
+        else:
+            continue
+        if repeat:
+            return repeat
+    return None
+
+def regex_first_literal(items):
+    """The literal character a parsed regex must start with, if any"""
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            return chr(av).lower()
+        if op == sre_parse.SUBPATTERN:
+            return regex_first_literal(av[-1])
+        return None
+    return None
+
+def regex_overlapping_branch(items, first):
+    """Whether items has an alternation whose branches can match the same text"""
+    for op, av in items:
+        if op == sre_parse.SUBPATTERN and regex_overlapping_branch(av[-1], first):
+            return True
+        if op == sre_parse.BRANCH:
+            branches = [list(branch) for branch in av[1]]
+            if any(branch in branches[index + 1:] for index, branch in enumerate(branches)):
+                return True
+            # a(?:|a), which is how (a|aa) parses, can match "aa" in two ways
+            if [] in branches and first in {regex_first_literal(branch) for branch in branches if branch}:
+                return True
+    return False
+
+def regex_backtracking_risk(items):
+    """Describe a construct in a parsed regex that can backtrack exponentially"""
+    for op, av in items:
+        if op in REGEX_REPEATS:
+            low, high, body = av
+            inner = regex_covering_repeat(body) if high > 1 else None
+            if inner and sre_parse.MAXREPEAT in (high, inner[1]):
+                return "it repeats a quantified group, like (a+)+"
+            first = regex_first_literal(body)
+            if high == sre_parse.MAXREPEAT and first and regex_overlapping_branch(body, first):
+                return "it repeats an alternation whose branches overlap, like (a|aa)+"
+            children = [body]
+        elif op == sre_parse.SUBPATTERN:
+            children = [av[-1]]
+        elif op == sre_parse.BRANCH:
+            children = av[1]
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            children = [av[1]]
+        else:
+            continue
+        for child in children:
+            reason = regex_backtracking_risk(child)
+            if reason:
+                return reason
+    return None
+
+def check_regex(keyword):
+    """Compile a search regex, rejecting patterns that can take exponential time"""
+    try:
+        parsed = sre_parse.parse(keyword, re.IGNORECASE)
+        pattern = re.compile(keyword, re.IGNORECASE)
+    except re.error as error:
+        raise ValueError(f"Invalid regular expression: {error}")
+    reason = regex_backtracking_risk(parsed)
+    if reason:
+        raise ValueError(f"Regular expression rejected: {reason}, which can take exponential time")
+    return pattern
+
+def regex_worker(connection, keyword, ranges, verse_budget):
+    """Scan verse id ranges for a regex, sending matches in batches"""
+    pattern = re.compile(keyword, re.IGNORECASE)
+    matches, scanned = [], 0
+    for start, end in ranges:
+        for verse_id in range(start, end):
+            if verse_budget is not None and scanned >= verse_budget:
+                connection.send((matches, "budget"))
+                return
+            if pattern.search(verse_texts[verse_id]):
+                matches.append(verse_id)
+            scanned += 1
+            if scanned % REGEX_BATCH_SIZE == 0:
+                connection.send((matches, None))
+                matches = []
+    connection.send((matches, "done"))
+
+def regex_search_ids(keyword, ranges, time_budget=None, verse_budget=None):
+    """Ids of the verses in ranges that match a regex, with (ids, truncated).
+
+    The scan runs in a worker process that is stopped after time_budget
+    seconds or verse_budget verses; the matches found until then are
+    returned with truncated set. Python's re can't be interrupted, so a
+    thread could not stop a pattern that backtracks without end.
+    """
+    check_regex(keyword)
+    if time_budget is None:
+        time_budget = REGEX_TIME_BUDGET
+    if verse_budget is None:
+        verse_budget = REGEX_VERSE_BUDGET
+
+    # Forked workers share the loaded verses instead of loading them again
+    if sys.platform != "darwin" and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    worker = context.Process(target=regex_worker, args=(sender, keyword, ranges, verse_budget), daemon=True)
+    worker.start()
+    sender.close()
+
+    verse_ids, truncated = [], True
+    deadline = time.monotonic() + time_budget
+    try:
+        while receiver.poll(max(deadline - time.monotonic(), 0)):
+            batch, status = receiver.recv()
+            verse_ids += batch
+            if status:
+                truncated = status == "budget"
+                break
+    except EOFError:
+        pass  # The worker died; keep what it found
+    finally:
+        worker.terminate()
+        worker.join()
+        receiver.close()
+    return verse_ids, truncated
+
+def search_verse_ids(keyword, options):
+    """Scan the verse store and return (ids of the verses that match, truncated).
+
+    truncated is set when a regex search ran out of time and only some of
+    the verses were scanned.
+    """
+    ranges = []
+    for book_idx, book in enumerate(dataset):
         # Apply testament filter
         if options.get("testament"):
-            # Determine testament based on book name
-            is_new_testament = book["name"] in [
-                "Matthew", "Mark", "Luke", "John", "Acts", "Romans", "1 Corinthians",
-                "2 Corinthians", "Galatians", "Ephesians", "Philippians", "Colossians",
-                "1 Thessalonians", "2 Thessalonians", "1 Timothy", "2 Timothy", "Titus",
-                "Philemon", "Hebrews", "James", "1 Peter", "2 Peter", "1 John",
-                "2 John", "3 John", "Jude", "Revelation"
-            ]
+            is_new_testament = book["name"] in NEW_TESTAMENT_BOOKS
             if options["testament"] == "new" and not is_new_testament:
                 continue
             if options["testament"] == "old" and is_new_testament:
                 continue
-        
-        for chapter_idx, chapter in enumerate(book["chapters"], start=1):
-            for verse_idx, verse_text in enumerate(chapter, start=1):
-                # Apply search
-                if pattern and pattern.search(verse_text):
-                    match = True
-                    highlighted_text = pattern.sub(f"[yellow]{pattern.pattern}[/yellow]", verse_text)
-                elif not pattern and keyword.lower() in verse_text.lower():
-                    match = True
-                    highlighted_text = re.sub(
-                        re.escape(keyword), 
-                        f"[yellow]{keyword}[/yellow]", 
-                        verse_text, 
-                        flags=re.IGNORECASE
-                    )
-                else:
-                    match = False
-                
-                if match:
-                    # Apply additional filters if specified
-                    if options.get("min_words"):
-                        if len(verse_text.split()) < options["min_words"]:
-                            continue
-                    if options.get("max_words"):
-                        if len(verse_text.split()) > options["max_words"]:
-                            continue
-                    
-                    results.append((book["name"], chapter_idx, verse_idx, highlighted_text))
-    
-    return results
+        starts = chapter_starts[book_idx]
+        ranges.append((starts[0], starts[-1]))
+
+    # Apply search
+    truncated = False
+    if options.get("regex", False):
+        matches, truncated = regex_search_ids(keyword, ranges)
+    else:
+        matches = [verse_id for start, end in ranges for verse_id in find_substring_ids(keyword, start, end)]
+
+    verse_ids = []
+    for verse_id in matches:
+        # Apply additional filters if specified
+        if options.get("min_words"):
+            if len(verse_texts[verse_id].split()) < options["min_words"]:
+                continue
+        if options.get("max_words"):
+            if len(verse_texts[verse_id].split()) > options["max_words"]:
+                continue
+
+        verse_ids.append(verse_id)
+    return verse_ids, truncated
+
+def highlight_spans(verse_text, spans):
+    """Wrap (start, end) spans of a verse in Rich markup"""
+    parts, last = [], 0
+    for start, end in spans:
+        parts += [verse_text[last:start], "[yellow]", verse_text[start:end], "[/yellow]"]
+        last = end
+    parts.append(verse_text[last:])
+    return "".join(parts)
+
+def search_pattern(keyword, regex=False):
+    """Case-insensitive pattern used to highlight a keyword or regex"""
+    return re.compile(keyword if regex else re.escape(keyword), re.IGNORECASE)
+
+class VerseRef:
+    """A verse by id that unpacks like a (book, chapter, verse, text) tuple.
+
+    Only the id is stored; the reference and text are looked up on access.
+    """
+    __slots__ = ("verse_id",)
+
+    def __init__(self, verse_id):
+        self.verse_id = verse_id
+
+    @property
+    def book(self):
+        return dataset[verse_refs[self.verse_id][0]]["name"]
+
+    @property
+    def chapter(self):
+        return verse_refs[self.verse_id][1]
+
+    @property
+    def verse(self):
+        return verse_refs[self.verse_id][2]
+
+    @property
+    def text(self):
+        return verse_texts[self.verse_id]
+
+    def __iter__(self):
+        return iter(verse_reference(self.verse_id) + (self.text,))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (VerseRef, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({format_verse_reference(self.verse_id)!r})"
+
+class SearchHit(VerseRef):
+    """A matching verse; its text is highlighted from the match spans on access"""
+    __slots__ = ("pattern",)
+
+    def __init__(self, verse_id, pattern=None):
+        super().__init__(verse_id)
+        self.pattern = pattern
+
+    @property
+    def spans(self):
+        if self.pattern is None:
+            return []
+        return [match.span() for match in self.pattern.finditer(verse_texts[self.verse_id])
+                if match.end() > match.start()]
+
+    @property
+    def text(self):
+        return highlight_spans(verse_texts[self.verse_id], self.spans)
+
+class SearchResults(Sequence):
+    """Search results stored as an array of verse ids.
+
+    Items are SearchHit objects made when accessed, so a result costs four
+    bytes until it is displayed instead of a tuple and a highlighted copy
+    of the verse.
+    """
+    __slots__ = ("verse_ids", "pattern", "truncated")
+
+    def __init__(self, verse_ids, pattern=None, truncated=False):
+        self.verse_ids = array("i", verse_ids)
+        self.pattern = pattern
+        self.truncated = truncated  # Set when the search stopped early
+
+    def __len__(self):
+        return len(self.verse_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SearchResults(self.verse_ids[index], self.pattern, self.truncated)
+        return SearchHit(self.verse_ids[index], self.pattern)
+
+    def __eq__(self, other):
+        if isinstance(other, SearchResults) and self.pattern == other.pattern:
+            return self.verse_ids == other.verse_ids
+        if isinstance(other, (SearchResults, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"SearchResults({len(self)} verses)"
+
+def advanced_search_ids(keyword, options=None, use_cache=True):
+    """Verse ids matched by advanced_search and whether the search was cut short.
+
+    Results come from the result cache when possible; truncated results are
+    not cached. Raises ValueError for an invalid or unsafe regex.
+    """
+    if options is None:
+        options = {}
+    if options.get("regex", False):
+        check_regex(keyword)
+
+    verse_ids = load_cached_query(keyword, options) if use_cache else None
+    if verse_ids is not None:
+        return verse_ids, False
+    verse_ids, truncated = search_verse_ids(keyword, options)
+    if use_cache and not truncated:
+        save_cached_query(keyword, options, verse_ids)
+    return verse_ids, truncated
+
+def advanced_search(keyword, options=None, use_cache=True):
+    """Enhanced search with additional filters"""
+    if options is None:
+        options = {}
+
+    verse_ids, truncated = advanced_search_ids(keyword, options, use_cache)
+    return SearchResults(verse_ids, search_pattern(keyword, options.get("regex", False)), truncated)
+
+class LiveSearch:
+    """Incremental substring search for search-as-you-type.
+
+    Each query's verse ids are kept on a stack; when the query is extended
+    only the previous matches are re-checked, and deleting characters pops
+    back to an earlier result set without scanning.
+    """
+
+    def __init__(self):
+        self.blob, self.offsets = load_corpus_blob()
+        self.vocabulary = load_term_matrix()["vocab"].tolist()
+        self.history = []  # (query, verse ids), each query a prefix of the next
+
+    def update(self, query):
+        """Return the ids of the verses containing query"""
+        query = query.lower()
+        while self.history and not query.startswith(self.history[-1][0]):
+            self.history.pop()
+        if not query:
+            return []
+        if self.history and self.history[-1][0] == query:
+            return self.history[-1][1]
+
+        if self.history:
+            find, offsets = self.blob.find, self.offsets
+            verse_ids = [verse_id for verse_id in self.history[-1][1]
+                         if find(query, offsets[verse_id], offsets[verse_id + 1] - 1) != -1]
+        else:
+            verse_ids = find_substring_ids(query)
+        self.history.append((query, verse_ids))
+        return verse_ids
+
+    def complete(self, query, limit=5):
+        """Complete the last word of query from the sorted vocabulary"""
+        prefix = query.lower().rsplit(" ", 1)[-1]
+        if not prefix:
+            return []
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + "\uffff", start)
+        return self.vocabulary[start:min(end, start + limit)]
+
+@contextlib.contextmanager
+def raw_terminal():
+    """Hand keypresses to read_key one at a time for the duration of the block.
+
+    Switched with TCSANOW so keys typed ahead are kept; output processing
+    stays on so printed lines still start at the left edge.
+    """
+    if msvcrt:
+        yield
+        return
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    try:
+        tty.setraw(fd, termios.TCSANOW)
+        settings = termios.tcgetattr(fd)
+        settings[1] |= termios.OPOST
+        termios.tcsetattr(fd, termios.TCSANOW, settings)
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSANOW, old_settings)
+
+def read_key():
+    """Read a single keypress from a terminal in raw_terminal() mode.
+
+    Special keys come back whole, e.g. "\x1b[A" for an arrow key, so their
+    trailing bytes are never read as typed text; on Windows they come back
+    as "".
+    """
+    if msvcrt:
+        key = msvcrt.getwch()
+        if key in ("\x00", "\xe0"):  # Prefix of an arrow or function key
+            msvcrt.getwch()
+            return ""
+        return key
+    fd = sys.stdin.fileno()
+    ready = lambda: select.select([fd], [], [], 0.05)[0]
+    key = os.read(fd, 1)
+    if key == b"\x1b" and ready():
+        # ESC [ params final-byte (CSI), ESC O x (SS3) or ESC x (Alt+x)
+        key += os.read(fd, 1)
+        if key == b"\x1b[":
+            while ready():
+                key += os.read(fd, 1)
+                if 0x40 <= key[-1] <= 0x7E:
+                    break
+        elif key == b"\x1bO" and ready():
+            key += os.read(fd, 1)
+    elif key and key[0] >= 0xC0:
+        key += os.read(fd, 1 + (key[0] >= 0xE0) + (key[0] >= 0xF0))  # Rest of a UTF-8 character
+    return key.decode("utf-8", errors="replace")
+
+def live_search():
+    """Search-as-you-type: results update on every keystroke"""
+    if not (msvcrt or termios) or not sys.stdin.isatty():
+        console.print("[red]Live search needs an interactive terminal.[/red]")
+        return
+
+    search = LiveSearch()
+    query = ""
+    verse_ids = []
+    elapsed = 0.0
+    visible_rows = max(3, console.size.height - 8)
+    with raw_terminal():
+        while True:
+            completions = search.complete(query)
+            console.clear()
+            console.print("[bold blue]Live Search[/bold blue] [yellow](Tab completes, Enter shows all results, Esc quits)[/yellow]")
+            console.print(f"> {query}", markup=False, highlight=False)
+            if completions:
+                console.print(f"[cyan]{'  '.join(completions)}[/cyan]")
+            console.print(f"[yellow]{len(verse_ids)} verses ({elapsed:.1f} ms)[/yellow]")
+            for verse_id in verse_ids[:visible_rows]:
+                book_name, chapter, verse = verse_reference(verse_id)
+                line = f"{book_name} {chapter}:{verse}  {verse_texts[verse_id]}"
+                console.print(line[:console.size.width - 1], markup=False, highlight=False)
+
+            key = read_key()
+            if key in ("\x1b", "\x03", "\x04"):
+                return
+            if key in ("\r", "\n"):
+                break
+            if key in ("\x7f", "\x08"):
+                query = query[:-1]
+            elif key == "\t" and completions:
+                query = query[:len(query) - len(query.rsplit(" ", 1)[-1])] + completions[0]
+            elif key.isprintable() and len(key) == 1:
+                query += key
+            else:
+                continue
+
+            started = time.perf_counter()
+            verse_ids = search.update(query)
+            elapsed = (time.perf_counter() - started) * 1000
+
+    display_search_results(SearchResults(verse_ids, search_pattern(query)), query)
+
+# Book, optional chapter:verse, optional "-" and chapter[:verse] or verse
+REFERENCE_PATTERN = re.compile(
+    r"^((?:(?:I|II|III|[123])\s+)?\D+?)(?:\s+(\d+)(?::(\d+))?(?:\s*-\s*(\d+)(?::(\d+))?)?)?$"
+)
+
+def parse_reference_range(reference, non_interactive=False):
+    """Resolve a reference to a half-open range of verse ids (start, end).
+
+    Accepts 'Book', 'Book 3', 'Book 3-5', 'Book 3:16', 'Book 3:16-18' and
+    'Book 3:16-4:2'. Returns None if the reference is invalid.
+    """
+    match = REFERENCE_PATTERN.match(reference.strip())
+    if not match:
+        if not non_interactive:
+            console.print(f"[red]Error: Invalid scripture format: '{reference}'.[/red]")
+        return None
+    book, chapter, verse, range_end, range_end_verse = match.groups()
+    best_match = confirm_best_match(book.strip(), non_interactive=non_interactive)
+    if not best_match:
+        if not non_interactive:
+            console.print(f"[red]No match found for '{book.strip()}'.[/red]")
+        return None
+    starts = chapter_starts[book_index[best_match.lower()]]
+    chapter_count = len(starts) - 1
+
+    def position(chapter, verse, at_end):
+        """Verse id of chapter:verse, or the chapter's first/last verse"""
+        chapter = int(chapter)
+        if chapter < 1 or chapter > chapter_count:
+            raise ValueError(f"Chapter {chapter} is out of range. {best_match} has {chapter_count} chapters.")
+        verse_count = starts[chapter] - starts[chapter - 1]
+        if verse is None:
+            return starts[chapter] - 1 if at_end else starts[chapter - 1]
+        verse = int(verse)
+        if verse < 1 or verse > verse_count:
+            raise ValueError(f"Verse {verse} is out of range. {best_match} Chapter {chapter} has {verse_count} verses.")
+        return starts[chapter - 1] + verse - 1
+
+    try:
+        if chapter is None:
+            start, last = starts[0], starts[-1] - 1
+        else:
+            start = position(chapter, verse, at_end=False)
+            if range_end is None:
+                last = position(chapter, verse, at_end=True)
+            elif range_end_verse is not None:
+                last = position(range_end, range_end_verse, at_end=True)
+            elif verse is not None:
+                last = position(chapter, range_end, at_end=True)
+            else:
+                last = position(range_end, None, at_end=True)
+    except ValueError as error:
+        if not non_interactive:
+            console.print(f"[red]Error: {error}[/red]")
+        return None
+    if last < start:
+        if not non_interactive:
+            console.print(f"[red]Error: '{reference}' ends before it starts.[/red]")
+        return None
+    return start, last + 1
 
 def lookup(book_name, chapter, start_verse, end_verse=None, non_interactive=False):
     """Lookup scripture by book, chapter, and verse"""
@@ -526,18 +1585,1120 @@ def confirm_best_match(book_name, non_interactive=False):
     response = console.input().lower()
     return best_match.title() if response == 'y' else None
 
-# Main execution
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
+def get_verse_id(book, chapter, verse):
+    """Return the verse id for a canonical book name, chapter and verse"""
+    return chapter_starts[book_index[book.lower()]][int(chapter) - 1] + int(verse) - 1
+
+def verse_reference(verse_id):
+    """Return (book, chapter, verse) for a verse id"""
+    book_idx, chapter, verse = verse_refs[verse_id]
+    return dataset[book_idx]["name"], chapter, verse
+
+def format_verse_reference(verse_id):
+    """Return 'Book Chapter:Verse' for a verse id"""
+    book_idx, chapter, verse = verse_refs[verse_id]
+    return f"{dataset[book_idx]['name']} {chapter}:{verse}"
+
+WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)*")
+
+def tokenize(text):
+    """Split verse text into lowercase words"""
+    return WORD_PATTERN.findall(text.lower())
+
+def dataset_checksum():
+    """Content hash of the dataset file, used to key on-disk caches"""
+    global _dataset_checksum
+    if _dataset_checksum is None:
+        digest = hashlib.sha1()
+        with open(corpus_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _dataset_checksum = digest.hexdigest()
+    return _dataset_checksum
+
+_dataset_checksum = None
+
+def index_bundle_dir():
+    """Directory of prebuilt indexes that are only valid for the current dataset"""
+    return os.path.join(CACHE_DIR, f"index-{dataset_checksum()[:16]}")
+
+def load_bundle_index(name):
+    """Memory-map an index from the bundle, or return None if it isn't built"""
+    path = os.path.join(index_bundle_dir(), name)
+    try:
+        return {file_name[:-len(".npy")]: np.load(os.path.join(path, file_name), mmap_mode="r")
+                for file_name in os.listdir(path) if file_name.endswith(".npy")}
+    except (OSError, ValueError):
+        return None
+
+def save_bundle_index(name, arrays):
+    """Write an index to the bundle.
+
+    The arrays are written to a temporary directory that is renamed into
+    place, so other processes see either the whole index or none of it.
+    """
+    path = os.path.join(index_bundle_dir(), name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(tmp_path)
+        for key, values in arrays.items():
+            np.save(os.path.join(tmp_path, f"{key}.npy"), values)
+        os.rename(tmp_path, path)
+    except OSError:
+        pass  # Already written by another process, or a read-only cache
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+def load_cached_arrays(name, build):
+    """Load NumPy arrays from the index bundle, building and saving them on a miss.
+
+    While a background build is running, wait for it to write the index
+    instead of building it a second time.
+    """
+    arrays = load_bundle_index(name)
+    while arrays is None and index_build_running():
+        time.sleep(0.1)
+        arrays = load_bundle_index(name)
+    if arrays is None:
+        arrays = build()
+        save_bundle_index(name, arrays)
+    return arrays
+
+def dataset_stamp():
+    """Modification time and size of the dataset, a cheap staleness check"""
+    stat = os.stat(corpus_file)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def write_completion_metadata(path=METADATA_FILE):
+    """Write the book names and verse counts that shell completion reads"""
+    books = []
+    for book_idx, book in enumerate(dataset):
+        starts = chapter_starts[book_idx]
+        books.append({
+            "name": book["name"],
+            "abbrev": book.get("abbrev", ""),
+            "verses": [end - start for start, end in zip(starts, starts[1:])],
+        })
+    metadata = {"dataset": dataset_stamp(), "books": books}
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+def ensure_completion_metadata(path=METADATA_FILE):
+    """Rewrite the completion metadata if it is missing or the dataset changed"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if json.load(f).get("dataset") == dataset_stamp():
+                return
+    except (OSError, ValueError):
+        pass
+    write_completion_metadata(path)
+
+QUERY_CACHE_DIR = os.path.join(CACHE_DIR, "queries")
+QUERY_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+def query_cache_path(keyword, options):
+    """Cache file for a search, keyed by query, options and dataset checksum"""
+    regex = bool(options.get("regex", False))
+    key = json.dumps({
+        "query": keyword if regex else keyword.lower(),
+        "options": {name: value for name, value in sorted(options.items()) if value},
+    }, sort_keys=True)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(QUERY_CACHE_DIR, f"{dataset_checksum()[:16]}-{digest}.ids")
+
+def load_cached_query(keyword, options):
+    """Return the cached verse ids of a search, or None on a miss"""
+    path = query_cache_path(keyword, options)
+    try:
+        with open(path, "rb") as f:
+            verse_ids = array("i")
+            verse_ids.frombytes(f.read())
+        os.utime(path)  # Mark as recently used for LRU eviction
+    except (OSError, ValueError):
+        return None
+    return verse_ids.tolist()
+
+def save_cached_query(keyword, options, verse_ids):
+    """Store the verse ids of a search and evict least recently used entries"""
+    path = query_cache_path(keyword, options)
+    try:
+        os.makedirs(QUERY_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(array("i", verse_ids).tobytes())
+        os.replace(tmp_path, path)
+        prune_query_cache()
+    except OSError:
+        pass
+
+def prune_query_cache(max_bytes=None):
+    """Drop entries for other datasets, then the oldest entries over the size limit"""
+    if max_bytes is None:
+        max_bytes = QUERY_CACHE_MAX_BYTES
+    prefix = f"{dataset_checksum()[:16]}-"
+    entries = []
+    for entry in os.scandir(QUERY_CACHE_DIR):
+        if not entry.name.endswith(".ids"):
+            continue
+        try:
+            if not entry.name.startswith(prefix):
+                os.remove(entry.path)
+                continue
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+def build_term_matrix():
+    """Count every word of every verse as a term-major sparse matrix.
+
+    Terms are sorted alphabetically; the verse ids and counts for term t are
+    verse_ids[term_ptr[t]:term_ptr[t + 1]], with verse ids in ascending order.
+    """
+    term_ids = {}
+    terms, rows, counts = [], [], []
+    for verse_id, verse_text in enumerate(verse_texts):
+        for word, count in Counter(tokenize(verse_text)).items():
+            terms.append(term_ids.setdefault(word, len(term_ids)))
+            rows.append(verse_id)
+            counts.append(count)
+
+    vocab = np.array(sorted(term_ids))
+    remap = np.empty(len(term_ids), dtype=np.int64)
+    remap[[term_ids[word] for word in vocab]] = np.arange(len(vocab))
+    terms = remap[np.array(terms, dtype=np.int64)]
+    rows = np.array(rows, dtype=np.int32)
+    order = np.lexsort((rows, terms))
+    term_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=len(vocab)), out=term_ptr[1:])
+    return {
+        "vocab": vocab,
+        "term_ptr": term_ptr,
+        "verse_ids": rows[order],
+        "counts": np.array(counts, dtype=np.int32)[order],
+    }
+
+@thread_safe_loader
+def load_term_matrix():
+    """Term × verse count matrix, cached on disk"""
+    global _term_matrix
+    if _term_matrix is None:
+        _term_matrix = load_cached_arrays("terms", build_term_matrix)
+    return _term_matrix
+
+_term_matrix = None
+
+def build_tfidf_weights():
+    """L2-normalised TF-IDF weights aligned with the term matrix entries"""
+    matrix = load_term_matrix()
+    term_ptr = matrix["term_ptr"]
+    verse_ids = matrix["verse_ids"]
+    document_frequency = np.diff(term_ptr)
+    idf = np.log((1 + len(verse_texts)) / (1 + document_frequency)) + 1
+    weights = (1 + np.log(matrix["counts"])) * np.repeat(idf, document_frequency)
+    norms = np.sqrt(np.bincount(verse_ids, weights=weights ** 2, minlength=len(verse_texts)))
+    return {"weights": (weights / norms[verse_ids]).astype(np.float32)}
+
+@thread_safe_loader
+def load_tfidf_weights():
+    """TF-IDF weights, cached on disk"""
+    global _tfidf_weights
+    if _tfidf_weights is None:
+        _tfidf_weights = load_cached_arrays("tfidf", build_tfidf_weights)["weights"]
+    return _tfidf_weights
+
+_tfidf_weights = None
+
+def find_similar_verses(book, chapter, verse, limit=20):
+    """Find the verses whose TF-IDF vectors are closest to the given verse"""
+    matrix = load_term_matrix()
+    weights = load_tfidf_weights()
+    term_ptr = matrix["term_ptr"]
+    verse_ids = matrix["verse_ids"]
+    target = get_verse_id(book, chapter, verse)
+
+    # Score every verse against the target using only the target's terms
+    rows, contributions = [], []
+    words = np.array(sorted(set(tokenize(verse_texts[target]))))
+    for term in np.searchsorted(matrix["vocab"], words):
+        start, end = term_ptr[term], term_ptr[term + 1]
+        postings = verse_ids[start:end]
+        position = start + np.searchsorted(postings, target)
+        rows.append(postings)
+        contributions.append(weights[start:end] * weights[position])
+    if not rows:
+        return []
+    scores = np.bincount(np.concatenate(rows), weights=np.concatenate(contributions),
+                         minlength=len(verse_texts))
+    scores[target] = 0
+
+    limit = min(limit, len(scores) - 1)
+    if limit < 1:
+        return []
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    results = []
+    for verse_id in top:
+        if scores[verse_id] <= 0:
+            break
+        book_name, chapter_num, verse_num = verse_reference(verse_id)
+        results.append((book_name, chapter_num, verse_num, verse_texts[verse_id]))
+    return results
+
+def display_similar_verses(scripture_input, limit=20):
+    """Look up a single verse and display the most similar verses"""
+    match = re.match(r"^((?:(?:I|II|III|[123])\s+)?\D+)\s+(\d+):(\d+)$", scripture_input.strip())
+    if not match:
+        console.print("[red]Error: Similar verses need a single verse, e.g. 'John 3:16'[/red]")
+        return
+    result = lookup(*match.groups())
+    if not result:
+        return
+
+    book_name, chapter, verse, verses = result
+    display_verses([(f"{book_name} {chapter}:{verse}", verses[0])])
+    similar = find_similar_verses(book_name, chapter, verse, limit)
+    if not similar:
+        console.print("[red]No similar verses found.[/red]")
+        return
+    display_verses([(f"{book} {chapter_num}:{verse_num}", text)
+                    for book, chapter_num, verse_num, text in similar],
+                   title=f"Verses similar to {book_name} {chapter}:{verse}")
+
+def build_stats_matrix():
+    """Aggregate the term matrix into term × chapter and term × book counts.
+
+    The term × chapter counts are sparse and term-major like the term matrix:
+    the chapters and counts for term t are chapter_ids/chapter_counts sliced
+    by chapter_ptr[t]:chapter_ptr[t + 1]. Chapter ids number every chapter of
+    the Bible in canonical order. The term × book counts are a dense array.
+    """
+    matrix = load_term_matrix()
+    term_ptr = matrix["term_ptr"]
+    n_terms = len(matrix["vocab"])
+    chapter_lengths = np.concatenate([np.diff(starts) for starts in chapter_starts])
+    chapter_books = np.repeat(np.arange(len(dataset)), [len(starts) - 1 for starts in chapter_starts])
+    verse_chapters = np.repeat(np.arange(len(chapter_lengths)), chapter_lengths)
+
+    # Entries are sorted by term then verse, so equal (term, chapter) keys are adjacent
+    entry_terms = np.repeat(np.arange(n_terms), np.diff(term_ptr))
+    keys = entry_terms * len(chapter_lengths) + verse_chapters[matrix["verse_ids"]]
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    chapter_counts = np.add.reduceat(matrix["counts"], boundaries) if len(boundaries) else matrix["counts"]
+    chapter_terms = entry_terms[boundaries]
+    chapter_ids = (keys[boundaries] % len(chapter_lengths)).astype(np.int32)
+    chapter_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(chapter_terms, minlength=n_terms), out=chapter_ptr[1:])
+
+    book_keys = chapter_terms * len(dataset) + chapter_books[chapter_ids]
+    book_counts = np.bincount(book_keys, weights=chapter_counts, minlength=n_terms * len(dataset))
+    return {
+        "chapter_ptr": chapter_ptr,
+        "chapter_ids": chapter_ids,
+        "chapter_counts": chapter_counts.astype(np.int32),
+        "chapter_books": chapter_books,
+        "book_counts": book_counts.reshape(n_terms, len(dataset)).astype(np.int32),
+    }
+
+@thread_safe_loader
+def load_stats_matrix():
+    """Word statistics matrices, cached next to the dataset"""
+    global _stats_matrix
+    if _stats_matrix is None:
+        _stats_matrix = load_cached_arrays("stats", build_stats_matrix)
+    return _stats_matrix
+
+_stats_matrix = None
+
+def find_term(word):
+    """Return the term index of a word, or None if it never occurs"""
+    vocab = load_term_matrix()["vocab"]
+    word = word.strip().lower()
+    term = int(np.searchsorted(vocab, word))
+    if term < len(vocab) and vocab[term] == word:
+        return term
+    return None
+
+def word_frequency(word):
+    """Count a word in every book, returning [(book, count)] for books that use it"""
+    term = find_term(word)
+    if term is None:
+        return []
+    counts = load_stats_matrix()["book_counts"][term]
+    return [(dataset[idx]["name"], int(counts[idx])) for idx in np.flatnonzero(counts)]
+
+def word_distribution(word, book):
+    """Count a word in every chapter of a book, returning [(chapter, count)]"""
+    term = find_term(word)
+    if term is None:
+        return []
+    stats = load_stats_matrix()
+    start, end = stats["chapter_ptr"][term], stats["chapter_ptr"][term + 1]
+    chapter_ids = stats["chapter_ids"][start:end]
+    counts = stats["chapter_counts"][start:end]
+    book_idx = book_index[book.lower()]
+    first_chapter = int(np.searchsorted(stats["chapter_books"], book_idx))
+    in_book = stats["chapter_books"][chapter_ids] == book_idx
+    return [(int(chapter_id) - first_chapter + 1, int(count))
+            for chapter_id, count in zip(chapter_ids[in_book], counts[in_book])]
+
+def top_words(book=None, limit=20, min_length=1):
+    """Rank the most frequent words of a book, or of the whole Bible"""
+    stats = load_stats_matrix()
+    vocab = load_term_matrix()["vocab"]
+    if book:
+        counts = stats["book_counts"][:, book_index[book.lower()]]
+    else:
+        counts = stats["book_counts"].sum(axis=1)
+    if min_length > 1:
+        counts = np.where(np.char.str_len(vocab) >= min_length, counts, 0)
+
+    limit = min(limit, len(counts))
+    if limit < 1:
+        return []
+    top = np.argpartition(-counts, limit - 1)[:limit]
+    top = top[np.lexsort((vocab[top], -counts[top]))]
+    return [(str(vocab[term]), int(counts[term])) for term in top if counts[term] > 0]
+
+def concordance(word, book=None):
+    """List every verse containing a word as (book, chapter, verse, count)"""
+    term = find_term(word)
+    if term is None:
+        return []
+    matrix = load_term_matrix()
+    start, end = matrix["term_ptr"][term], matrix["term_ptr"][term + 1]
+    verse_ids = matrix["verse_ids"][start:end]
+    counts = matrix["counts"][start:end]
+    if book:
+        starts = chapter_starts[book_index[book.lower()]]
+        low, high = np.searchsorted(verse_ids, [starts[0], starts[-1]])
+        verse_ids, counts = verse_ids[low:high], counts[low:high]
+    return [verse_reference(verse_id) + (int(count),) for verse_id, count in zip(verse_ids, counts)]
+
+def term_postings(word):
+    """Sorted verse ids of the verses containing a word; 'word*' matches a prefix"""
+    matrix = load_term_matrix()
+    vocab, term_ptr, verse_ids = matrix["vocab"], matrix["term_ptr"], matrix["verse_ids"]
+    word = word.lower()
+    if word.endswith("*"):
+        first, last = np.searchsorted(vocab, [word[:-1], word[:-1] + "\uffff"])
+        if last - first == 1:
+            return verse_ids[term_ptr[first]:term_ptr[last]].tolist()
+        return np.unique(verse_ids[term_ptr[first]:term_ptr[last]]).tolist()
+    term = find_term(word)
+    if term is None:
+        return []
+    return verse_ids[term_ptr[term]:term_ptr[term + 1]].tolist()
+
+def gallop_intersect(small, large):
+    """Intersect two sorted id lists, galloping through the larger one"""
+    result = []
+    low, size = 0, len(large)
+    for verse_id in small:
+        bound = 1
+        while low + bound < size and large[low + bound] < verse_id:
+            bound *= 2
+        low = bisect_left(large, verse_id, low, min(low + bound + 1, size))
+        if low == size:
+            break
+        if large[low] == verse_id:
+            result.append(verse_id)
+    return result
+
+def gallop_difference(verse_ids, excluded):
+    """Remove the ids in one sorted list from another"""
+    result = []
+    low, size = 0, len(excluded)
+    for verse_id in verse_ids:
+        bound = 1
+        while low + bound < size and excluded[low + bound] < verse_id:
+            bound *= 2
+        low = bisect_left(excluded, verse_id, low, min(low + bound + 1, size))
+        if low == size or excluded[low] != verse_id:
+            result.append(verse_id)
+    return result
+
+QUERY_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|(\w+):"([^"]*)"|(\w+):(\S+?)(?=[\s()]|$)|"([^"]*)"|([^\s()"]+))')
+
+def tokenize_query(query):
+    """Split a query into (kind, value) tokens"""
+    tokens = []
+    position = 0
+    query = query.strip()
+    while position < len(query):
+        match = QUERY_TOKEN_PATTERN.match(query, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unexpected character at position {position}: {query[position:]!r}")
+        position = match.end()
+        open_paren, close_paren, quoted_field, quoted_value, field, value, phrase, word = match.groups()
+        if open_paren:
+            tokens.append(("(", None))
+        elif close_paren:
+            tokens.append((")", None))
+        elif quoted_field or field:
+            tokens.append(("field", ((quoted_field or field).lower(), quoted_value if quoted_field else value)))
+        elif phrase is not None:
+            tokens.append(("phrase", phrase))
+        elif word in ("AND", "OR", "NOT"):
+            tokens.append((word, None))
+        else:
+            tokens.append(("word", word))
+    return tokens
+
+def parse_query(query):
+    """Parse a boolean query into a plan tree.
+
+    Grammar: words are ANDed implicitly, OR binds looser than AND, NOT negates
+    the next term, parentheses group, "quoted phrases" match consecutive words,
+    a trailing * matches a prefix and book:, testament: and chapter: filter by
+    location. Nodes are ("term", word), ("phrase", words), ("range", spans),
+    ("and", children), ("or", children) and ("not", child).
+    """
+    tokens = tokenize_query(query)
+    position = 0
+
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        children = [parse_and()]
+        while peek() == "OR":
+            take()
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def parse_and():
+        children = [parse_not()]
+        while peek() not in (None, ")", "OR"):
+            if peek() == "AND":
+                take()
+            children.append(parse_not())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        if peek() is None:
+            raise ValueError("Query ended unexpectedly")
+        kind, value = take()
+        if kind == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise ValueError("Missing closing parenthesis")
+            take()
+            return node
+        if kind == "word":
+            words = tokenize(value.rstrip("*"))
+            if len(words) != 1:
+                raise ValueError(f"Invalid search term: {value!r}")
+            return ("term", words[0] + ("*" if value.endswith("*") else ""))
+        if kind == "phrase":
+            words = tokenize(value)
+            if not words:
+                raise ValueError("Empty phrase")
+            return ("phrase", words) if len(words) > 1 else ("term", words[0])
+        if kind == "field":
+            return ("range", field_ranges(*value))
+        raise ValueError(f"Unexpected {kind}")
+
+    if not tokens:
+        raise ValueError("Empty query")
+    node = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected {tokens[position][0]}")
+    return node
+
+def field_ranges(field, value):
+    """Verse id spans [(start, end)] selected by a book:, testament: or chapter: filter"""
+    if field == "book":
+        book = confirm_best_match(value, non_interactive=True)
+        if not book:
+            raise ValueError(f"Unknown book: {value!r}")
+        starts = chapter_starts[book_index[book.lower()]]
+        return [(starts[0], starts[-1])]
+    if field == "testament":
+        if value.lower() not in ("old", "new"):
+            raise ValueError("testament: must be old or new")
+        new = value.lower() == "new"
+        return [(starts[0], starts[-1]) for book, starts in zip(dataset, chapter_starts)
+                if (book["name"] in NEW_TESTAMENT_BOOKS) == new]
+    if field == "chapter":
+        if not value.isdigit():
+            raise ValueError("chapter: must be a number")
+        chapter = int(value)
+        return [(starts[chapter - 1], starts[chapter]) for starts in chapter_starts
+                if 0 < chapter < len(starts)]
+    raise ValueError(f"Unknown field: {field}:")
+
+def query_cost(node):
+    """Estimate how many verse ids a plan node produces"""
+    kind = node[0]
+    if kind == "term":
+        if node[1].endswith("*"):
+            return len(term_postings(node[1]))
+        term = find_term(node[1])
+        return 0 if term is None else int(np.diff(load_term_matrix()["term_ptr"][term:term + 2])[0])
+    if kind == "phrase":
+        return min(query_cost(("term", word)) for word in node[1])
+    if kind == "range":
+        return sum(end - start for start, end in node[1])
+    if kind == "and":
+        costs = [query_cost(child) for child in node[1] if child[0] != "not"]
+        return min(costs) if costs else len(verse_texts)
+    if kind == "or":
+        return sum(query_cost(child) for child in node[1])
+    return len(verse_texts) - query_cost(node[1])
+
+def in_ranges(verse_id, ranges):
+    """Check whether a verse id falls in sorted (start, end) spans"""
+    idx = bisect_right(ranges, (verse_id, len(verse_texts))) - 1
+    return idx >= 0 and ranges[idx][0] <= verse_id < ranges[idx][1]
+
+def evaluate_query(node):
+    """Evaluate a plan node into a sorted list of verse ids"""
+    kind = node[0]
+    if kind == "term":
+        return term_postings(node[1])
+    if kind == "range":
+        return [verse_id for start, end in node[1] for verse_id in range(start, end)]
+    if kind == "phrase":
+        verse_ids = evaluate_query(("and", [("term", word) for word in node[1]]))
+        pattern = re.compile(r"\b" + r"\W+".join(map(re.escape, node[1])) + r"\b", re.IGNORECASE)
+        return [verse_id for verse_id in verse_ids if pattern.search(verse_texts[verse_id])]
+    if kind == "or":
+        return sorted(set().union(*(evaluate_query(child) for child in node[1])))
+    if kind == "not":
+        return gallop_difference(range(len(verse_texts)), evaluate_query(node[1]))
+
+    # AND: start from the cheapest positive child and narrow it down
+    positive = sorted((child for child in node[1] if child[0] != "not"), key=query_cost)
+    negative = sorted((child[1] for child in node[1] if child[0] == "not"), key=query_cost)
+    verse_ids = evaluate_query(positive[0]) if positive else range(len(verse_texts))
+    for child in positive[1:]:
+        if not verse_ids:
+            return []
+        if child[0] == "range":
+            ranges = sorted(child[1])
+            verse_ids = [verse_id for verse_id in verse_ids if in_ranges(verse_id, ranges)]
+        else:
+            verse_ids = gallop_intersect(verse_ids, evaluate_query(child))
+    for child in negative:
+        if not verse_ids:
+            return []
+        if child[0] == "range":
+            ranges = sorted(child[1])
+            verse_ids = [verse_id for verse_id in verse_ids if not in_ranges(verse_id, ranges)]
+        else:
+            verse_ids = gallop_difference(verse_ids, evaluate_query(child))
+    return list(verse_ids)
+
+def query_terms(node):
+    """Words and phrases a query searches for, used for highlighting"""
+    kind = node[0]
+    if kind == "term":
+        return [re.escape(node[1].rstrip("*")) + (r"\w*" if node[1].endswith("*") else "")]
+    if kind == "phrase":
+        return [r"\W+".join(map(re.escape, node[1]))]
+    if kind in ("and", "or"):
+        return [term for child in node[1] for term in query_terms(child)]
+    return []
+
+def query_search(query):
+    """Search with a boolean query, e.g. 'faith AND (grace OR mercy) NOT book:James'"""
+    plan = parse_query(query)
+    terms = query_terms(plan)
+    pattern = re.compile(r"\b(?:" + "|".join(terms) + r")\b", re.IGNORECASE) if terms else None
+    return SearchResults(evaluate_query(plan), pattern)
+
+def display_stats_table(title, columns, rows):
+    """Display statistics rows using Rich table"""
+    if not rows:
+        console.print("[red]No occurrences found.[/red]")
+        return
+    console.print(f"\n[bold blue]{title}[/bold blue]")
+    table = Table(show_header=True, header_style="bold blue", show_lines=False, box=box.ROUNDED)
+    for column in columns:
+        table.add_column(column, style="cyan" if column == columns[0] else "white")
+    for row in rows:
+        table.add_row(*(str(value) for value in row))
+    console.print(table)
+
+def run_stats(argv):
+    """Handle `bible stats` subcommands"""
+    parser = argparse.ArgumentParser(prog="bible stats", description="Word frequency statistics")
+    commands = parser.add_subparsers(dest="command", required=True)
+    word_parser = commands.add_parser("word", help="Count a word in every book")
+    word_parser.add_argument("word")
+    chapters_parser = commands.add_parser("chapters", help="Count a word in every chapter of a book")
+    chapters_parser.add_argument("word")
+    chapters_parser.add_argument("--book", required=True, help="Book to break down by chapter")
+    top_parser = commands.add_parser("top", help="Most frequent words")
+    top_parser.add_argument("--book", help="Limit the ranking to one book")
+    top_parser.add_argument("--limit", type=int, default=20, help="Number of words to show")
+    top_parser.add_argument("--min-length", type=int, default=1, help="Ignore shorter words")
+    concordance_parser = commands.add_parser("concordance", help="List every verse containing a word")
+    concordance_parser.add_argument("word")
+    concordance_parser.add_argument("--book", help="Limit the concordance to one book")
+    args = parser.parse_args(argv)
+
+    book = None
+    if getattr(args, "book", None):
+        book = confirm_best_match(args.book)
+        if not book:
+            console.print(f"[red]No match found for '{args.book}'.[/red]")
+            return
+
+    if args.command == "word":
+        rows = word_frequency(args.word)
+        total = sum(count for _, count in rows)
+        display_stats_table(f"'{args.word}' occurs {total} times", ["Book", "Count"], rows)
+    elif args.command == "chapters":
+        rows = [(f"{book} {chapter}", count) for chapter, count in word_distribution(args.word, book)]
+        display_stats_table(f"'{args.word}' in {book}", ["Chapter", "Count"], rows)
+    elif args.command == "top":
+        rows = top_words(book, args.limit, args.min_length)
+        display_stats_table(f"Most frequent words in {book or 'the Bible'}", ["Word", "Count"], rows)
+    elif args.command == "concordance":
+        rows = [(f"{book_name} {chapter}:{verse}", count)
+                for book_name, chapter, verse, count in concordance(args.word, book)]
+        display_stats_table(f"Concordance for '{args.word}'", ["Scripture", "Count"], rows)
+
+EXPORT_FORMATS = ("csv", "jsonl", "markdown")
+
+def export_verses(verse_ids, output, export_format="csv"):
+    """Write verses to a text stream as CSV, JSON Lines or a Markdown table.
+
+    verse_ids may be any iterable, such as a range or a generator, and rows
+    are written as they are produced. Returns the number of verses written.
+    """
+    count = 0
+    if export_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(["book", "chapter", "verse", "text"])
+        for verse_id in verse_ids:
+            writer.writerow(verse_reference(verse_id) + (verse_texts[verse_id],))
+            count += 1
+    elif export_format == "jsonl":
+        for verse_id in verse_ids:
+            book_name, chapter, verse = verse_reference(verse_id)
+            output.write(json.dumps({"book": book_name, "chapter": chapter, "verse": verse,
+                                     "text": verse_texts[verse_id]}, ensure_ascii=False))
+            output.write("\n")
+            count += 1
+    elif export_format == "markdown":
+        output.write("| Scripture | Text |\n| --- | --- |\n")
+        for verse_id in verse_ids:
+            text = verse_texts[verse_id].replace("|", "\\|")
+            output.write(f"| {format_verse_reference(verse_id)} | {text} |\n")
+            count += 1
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return count
+
+def run_export(argv):
+    """Handle `bible export`"""
+    parser = argparse.ArgumentParser(prog="bible export", description="Export passages or search results")
+    parser.add_argument("references", nargs="*", help="Scriptures or ranges, e.g. 'John 3' 'Genesis 1:26-2:3'")
+    parser.add_argument("--all", action="store_true", help="Export the whole Bible")
+    parser.add_argument("-s", "--search", help="Export the results of a keyword search")
+    parser.add_argument("--search-file", metavar="FILE", help="Search for every keyword in a file, one per line")
+    parser.add_argument("-q", "--query", help="Export the results of a boolean query")
+    parser.add_argument("--regex", action="store_true", help="Enable regex search")
+    parser.add_argument("--testament", choices=["old", "new"], help="Filter by testament")
+    parser.add_argument("--min-words", type=int, help="Minimum words in verse")
+    parser.add_argument("--max-words", type=int, help="Maximum words in verse")
+    parser.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="csv", help="Output format")
+    parser.add_argument("-o", "--output", help="Output file (default: standard output)")
+    args = parser.parse_args(argv)
+    errors = Console(stderr=True)  # Keeps messages out of data exported to stdout
+
+    if args.all:
+        verse_ids = range(len(verse_texts))
+    elif args.search:
+        options = {"regex": args.regex}
+        if args.testament:
+            options["testament"] = args.testament
+        if args.min_words:
+            options["min_words"] = args.min_words
+        if args.max_words:
+            options["max_words"] = args.max_words
+        try:
+            verse_ids, truncated = advanced_search_ids(args.search, options)
+        except ValueError as error:
+            errors.print(f"[red]Error: {error}[/red]")
+            sys.exit(1)
+        if truncated:
+            errors.print("[yellow]The search took too long and was stopped; only the first matches are exported.[/yellow]")
+    elif args.search_file:
+        options = {}
+        if args.testament:
+            options["testament"] = args.testament
+        if args.min_words:
+            options["min_words"] = args.min_words
+        if args.max_words:
+            options["max_words"] = args.max_words
+        try:
+            keywords = read_keyword_file(args.search_file)
+        except OSError as error:
+            errors.print(f"[red]Error: {error}[/red]")
+            sys.exit(1)
+        all_results = search_keywords(keywords, options).values()
+        verse_ids = sorted(set().union(*(results.verse_ids for results in all_results)))
+    elif args.query:
+        try:
+            verse_ids = evaluate_query(parse_query(args.query))
+        except ValueError as error:
+            errors.print(f"[red]Error: {error}[/red]")
+            sys.exit(1)
+    elif args.references:
+        ranges = []
+        for reference in args.references:
+            passage = parse_reference_range(reference, non_interactive=True)
+            if not passage:
+                errors.print(f"[red]Error: Invalid reference: '{reference}'.[/red]")
+                sys.exit(1)
+            ranges.append(range(*passage))
+        verse_ids = (verse_id for passage in ranges for verse_id in passage)
+    else:
+        parser.error("give references, --all, --search, --search-file or --query")
+
+    if args.output:
+        try:
+            with open(args.output, "w", encoding="utf-8", newline="", buffering=1 << 16) as output:
+                count = export_verses(verse_ids, output, args.format)
+        except OSError as error:
+            errors.print(f"[red]Error: {error}[/red]")
+            sys.exit(1)
+        console.print(f"[green]Exported {count} verses to {args.output}.[/green]")
+    else:
+        export_verses(verse_ids, sys.stdout, args.format)
+
+def format_reference_range(start, end):
+    """Shortest reference for a half-open verse id range within one book"""
+    book_idx, first_chapter, first_verse = verse_refs[start]
+    _, last_chapter, last_verse = verse_refs[end - 1]
+    name = dataset[book_idx]["name"]
+    starts = chapter_starts[book_idx]
+    if start == starts[0] and end == starts[-1]:
+        return name
+    if first_verse == 1 and end == starts[last_chapter]:
+        if first_chapter == last_chapter:
+            return f"{name} {first_chapter}"
+        return f"{name} {first_chapter}-{last_chapter}"
+    if first_chapter == last_chapter:
+        if first_verse == last_verse:
+            return f"{name} {first_chapter}:{first_verse}"
+        return f"{name} {first_chapter}:{first_verse}-{last_verse}"
+    return f"{name} {first_chapter}:{first_verse}-{last_chapter}:{last_verse}"
+
+def format_reference_ranges(verse_ids):
+    """References for ascending verse ids, split into contiguous runs within books"""
+    references = []
+    run_start = previous = None
+    for verse_id in verse_ids:
+        if previous is not None and (verse_id != previous + 1 or verse_refs[verse_id][0] != verse_refs[previous][0]):
+            references.append(format_reference_range(run_start, previous + 1))
+            run_start = None
+        if run_start is None:
+            run_start = verse_id
+        previous = verse_id
+    if run_start is not None:
+        references.append(format_reference_range(run_start, previous + 1))
+    return references
+
+def build_word_counts():
+    """Number of words in every verse, by verse id"""
+    return {"counts": np.fromiter((len(verse_text.split()) for verse_text in verse_texts),
+                                  dtype=np.int64, count=len(verse_texts))}
+
+@thread_safe_loader
+def load_word_counts():
+    """Number of words in every verse, cached on disk"""
+    global _word_counts
+    if _word_counts is None:
+        _word_counts = load_cached_arrays("words", build_word_counts)["counts"]
+    return _word_counts
+
+_word_counts = None
+
+# Indexes kept in the bundle, in build order (tfidf is built from terms)
+INDEX_BUILDERS = {
+    "terms": build_term_matrix,
+    "tfidf": build_tfidf_weights,
+    "stats": build_stats_matrix,
+    "words": build_word_counts,
+}
+
+INDEX_BUILD_MARKER = "building"
+INDEX_BUILD_TIMEOUT = 600
+
+def build_index_bundle():
+    """Build every index missing from the bundle and remove stale bundles"""
+    for name, build in INDEX_BUILDERS.items():
+        if load_bundle_index(name) is None:
+            save_bundle_index(name, build())
+    prune_index_bundles()
+    try:
+        os.remove(os.path.join(index_bundle_dir(), INDEX_BUILD_MARKER))
+    except OSError:
+        pass
+
+def index_build_running():
+    """Whether another process holds the bundle's build marker.
+
+    The marker holds the builder's process id; a marker whose process has
+    exited, or one older than INDEX_BUILD_TIMEOUT, is from a build that died.
+    """
+    marker = os.path.join(index_bundle_dir(), INDEX_BUILD_MARKER)
+    try:
+        with open(marker, encoding="utf-8") as f:
+            pid = int(f.read() or 0)
+        if time.time() - os.path.getmtime(marker) > INDEX_BUILD_TIMEOUT:
+            return False
+    except (OSError, ValueError):
+        return False
+    if pid == os.getpid():
+        return False
+    if pid and not msvcrt:  # os.kill(pid, 0) would terminate the process on Windows
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+    return True
+
+def start_index_build():
+    """Build missing indexes in a background process so later runs start warm.
+
+    Called once a run has finished, so the build never repeats work the run
+    itself did. The build marker stops concurrent runs from starting
+    duplicate builds and makes them wait for the index instead.
+    """
+    bundle = index_bundle_dir()
+    if all(os.path.isdir(os.path.join(bundle, name)) for name in INDEX_BUILDERS):
+        return
+    marker = os.path.join(bundle, INDEX_BUILD_MARKER)
+    if not index_build_running():
+        try:
+            os.remove(marker)
+        except OSError:
+            pass
+    try:
+        os.makedirs(bundle, exist_ok=True)
+        fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except OSError:
+        return  # Another build is running, or the cache is read-only
+    try:
+        process = subprocess.Popen([sys.executable, "-c", "import bible_cli; bible_cli.build_index_bundle()"],
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError:
+        os.close(fd)
+        os.remove(marker)
+        return
+    os.write(fd, str(process.pid).encode())
+    os.close(fd)
+
+def prune_index_bundles():
+    """Remove index bundles left over from other datasets"""
+    current = os.path.basename(index_bundle_dir())
+    try:
+        entries = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.startswith("index-") and entry != current:
+            shutil.rmtree(os.path.join(CACHE_DIR, entry), ignore_errors=True)
+
+def reading_plan(ranges, days, split="chapter"):
+    """Split verse id ranges into days of nearly equal word counts.
+
+    Days end on chapter boundaries, or on any verse with split="verse". Each
+    day boundary goes to the unit boundary whose running word count is
+    closest to an even share, found in a single pass over the prefix sums.
+    Returns a list of (verse ids, word count), one per day.
+    """
+    verse_ids = np.concatenate([np.arange(start, end) for start, end in ranges]) if ranges else np.arange(0)
+    if len(verse_ids) == 0:
+        return []
+    prefix = np.concatenate(([0], np.cumsum(load_word_counts()[verse_ids])))
+    if split == "verse":
+        boundaries = np.arange(len(verse_ids) + 1)
+    else:
+        # A chapter starts at verse 1 or wherever a selected range starts
+        verse_numbers = np.fromiter((verse_refs[verse_id][2] for verse_id in verse_ids),
+                                    dtype=np.int64, count=len(verse_ids))
+        new_run = np.r_[True, np.diff(verse_ids) != 1]
+        boundaries = np.r_[np.flatnonzero((verse_numbers == 1) | new_run), len(verse_ids)]
+    units = len(boundaries) - 1
+    days = max(1, min(days, units))
+    totals = prefix[boundaries]
+
+    cuts = [0]
+    unit = 0
+    for day in range(1, days):
+        target = totals[-1] * day / days
+        # Leave at least one unit for each remaining day
+        latest = units - (days - day)
+        while unit < latest and totals[unit + 1] <= target:
+            unit += 1
+        if unit < latest and target - totals[unit] > totals[unit + 1] - target:
+            unit += 1
+        unit = max(unit, cuts[-1] + 1)
+        cuts.append(unit)
+    cuts.append(units)
+
+    plan = []
+    for first, last in zip(cuts, cuts[1:]):
+        start, end = boundaries[first], boundaries[last]
+        plan.append((verse_ids[start:end].tolist(), int(prefix[end] - prefix[start])))
+    return plan
+
+def run_plan(argv):
+    """Handle `bible plan`"""
+    parser = argparse.ArgumentParser(prog="bible plan", description="Generate a balanced reading plan")
+    parser.add_argument("references", nargs="*", help="Books or ranges to read (default: the whole Bible)")
+    parser.add_argument("--days", type=int, required=True, help="Number of days")
+    parser.add_argument("--testament", choices=["old", "new"], help="Read one testament")
+    parser.add_argument("--books", help="Comma-separated list of books to read")
+    parser.add_argument("--split", choices=["chapter", "verse"], default="chapter",
+                        help="End each day on a chapter or on any verse")
+    args = parser.parse_args(argv)
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+
+    references = list(args.references)
+    if args.books:
+        references += [book.strip() for book in args.books.split(",") if book.strip()]
+    if args.testament:
+        ranges = field_ranges("testament", args.testament)
+    elif references:
+        ranges = []
+        for reference in references:
+            passage = parse_reference_range(reference)
+            if not passage:
+                return
+            ranges.append(passage)
+    else:
+        ranges = [(0, len(verse_texts))]
+
+    plan = reading_plan(ranges, args.days, args.split)
+    if len(plan) < args.days:
+        console.print(f"[yellow]Only {len(plan)} days are possible with {args.split} boundaries.[/yellow]")
+    console.print(f"\n[bold blue]Reading plan: {len(plan)} days[/bold blue]")
+    table = Table(show_header=True, header_style="bold blue", show_lines=False, box=box.ROUNDED)
+    table.add_column("Day", style="cyan", justify="right")
+    table.add_column("Reading", style="white")
+    table.add_column("Words", style="white", justify="right")
+    for day, (verse_ids, words) in enumerate(plan, start=1):
+        table.add_row(str(day), "; ".join(format_reference_ranges(verse_ids)), str(words))
+    console.print(table)
+
+def run_bookmarks(argv):
+    """Handle `bible bookmarks` and `bible bookmarks add`"""
+    if argv and argv[0] == "add":
+        parser = argparse.ArgumentParser(prog="bible bookmarks add", description="Bookmark a verse")
+        parser.add_argument("reference", help="Scripture to bookmark, e.g. 'John 3:16'")
+        parser.add_argument("--note", default="", help="Note to save with the bookmark")
+        parser.add_argument("--tags", default="", help="Comma-separated tags")
+        args = parser.parse_args(argv[1:])
+        passage = parse_reference_range(args.reference)
+        if passage:
+            save_bookmark(format_reference_range(*passage), args.note, args.tags.split(","))
+        return
+
+    parser = argparse.ArgumentParser(prog="bible bookmarks", description="List and filter bookmarks",
+                                     epilog="Use `bible bookmarks add REFERENCE` to add one.")
+    parser.add_argument("reference", nargs="?", help="Only bookmarks in a book or range, e.g. 'Romans'")
+    parser.add_argument("--tag", help="Only bookmarks with this tag")
+    parser.add_argument("--search", help="Only bookmarks whose note contains these words")
+    parser.add_argument("--since", help="Only bookmarks saved on or after a date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Only bookmarks saved on or before a date (YYYY-MM-DD)")
+    parser.add_argument("--page-size", type=int, default=20, help="Bookmarks per page")
+    args = parser.parse_args(argv)
+    display_bookmarks(page_size=max(args.page_size, 1), reference=args.reference, tag=args.tag,
+                      text=args.search, since=args.since, until=args.until)
+
+def run_completion(argv):
+    """Handle `bible completion SHELL`"""
+    parser = argparse.ArgumentParser(prog="bible completion", description="Print a shell completion script",
+                                     epilog='Add `eval "$(bible-complete --script bash)"` to ~/.bashrc, or the zsh/fish '
+                                            'equivalent; it prints the same script without loading the Bible.')
+    parser.add_argument("shell", choices=sorted(COMPLETION_SCRIPTS), help="Shell to complete in")
+    args = parser.parse_args(argv)
+    write_completion_metadata()
+    sys.stdout.write(COMPLETION_SCRIPTS[args.shell])
+
+def run_compress(argv):
+    """Handle `bible compress`"""
+    parser = argparse.ArgumentParser(prog="bible compress", description="Write the Bible as a block-compressed corpus",
+                                     epilog=f"{COMPRESSED_DATASET_FILE} is read when {DATASET_FILE} is absent.")
+    parser.add_argument("-o", "--output", default=COMPRESSED_DATASET_FILE, help="Output file")
+    parser.add_argument("--codec", choices=sorted(COMPRESSION_CODECS), default="zlib",
+                        help="Compression for each chapter block")
+    args = parser.parse_args(argv)
+    try:
+        size = write_compressed_corpus(args.output, args.codec)
+    except OSError as error:
+        console.print(f"[red]Error: {error}[/red]")
+        return
+    console.print(f"[green]Wrote {args.output}: {size:,} bytes, "
+                  f"{size / os.path.getsize(corpus_file):.0%} of {corpus_file}.[/green]")
+
+# Subcommands that take their own arguments, e.g. `bible stats top`
+COMMANDS = {
+    "stats": run_stats,
+    "export": run_export,
+    "plan": run_plan,
+    "bookmarks": run_bookmarks,
+    "completion": run_completion,
+    "compress": run_compress,
+}
+
+def run_default(argv):
+    """Handle `bible` without a subcommand: searches, lookups and the menu"""
+    parser = argparse.ArgumentParser(prog="bible", epilog=f"Commands: {', '.join(COMMANDS)}")
     parser.add_argument("-s", "--search", help="Search for a keyword or phrase")
+    parser.add_argument("--search-file", metavar="FILE", help="Search for every keyword in a file, one per line")
+    parser.add_argument("-q", "--query", help="Boolean search, e.g. 'faith AND (grace OR \"good works\") NOT book:James'")
     parser.add_argument("--regex", action="store_true", help="Enable regex search")
     parser.add_argument("--testament", choices=["old", "new"], help="Filter by testament")
     parser.add_argument("--min-words", type=int, help="Minimum words in verse")
     parser.add_argument("--max-words", type=int, help="Maximum words in verse")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and don't update the search result cache")
+    parser.add_argument("--similar", metavar="SCRIPTURE", help="Find verses similar to a verse (e.g., 'John 3:16')")
+    parser.add_argument("--limit", type=int, default=20, help="Number of similar verses to show")
     parser.add_argument("scripture", nargs="?", help="Lookup a scripture (e.g., 'John 3:16')")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
-    if args.search:
+    if args.search or args.search_file:
         options = {"regex": args.regex}
         if args.testament:
             options["testament"] = args.testament
@@ -545,9 +2706,48 @@ if __name__ == "__main__":
             options["min_words"] = args.min_words
         if args.max_words:
             options["max_words"] = args.max_words
-        results = advanced_search(args.search, options)
-        display_search_results(results, args.search)
+        if args.search:
+            display_search(args.search, options, use_cache=not args.no_cache)
+            return
+        try:
+            keywords = read_keyword_file(args.search_file)
+        except OSError as error:
+            console.print(f"[red]Error: {error}[/red]")
+            return
+        if args.regex:
+            console.print("[yellow]--regex is ignored with --search-file.[/yellow]")
+        all_results = search_keywords(keywords, options)
+        display_stats_table(f"Results for {len(all_results)} keywords", ["Keyword", "Verses"],
+                            [(keyword, len(results)) for keyword, results in all_results.items()])
+        for keyword, results in all_results.items():
+            if results:
+                display_search_results(results, keyword)
+    elif args.query:
+        try:
+            results = query_search(args.query)
+        except ValueError as error:
+            console.print(f"[red]Error: {error}[/red]")
+            return
+        display_search_results(results, args.query)
+    elif args.similar:
+        display_similar_verses(args.similar, args.limit)
     elif args.scripture:
         process_scripture(args.scripture)
     else:
         main_menu()
+
+def main(argv=None):
+    """Command-line entry point"""
+    if argv is None:
+        argv = sys.argv[1:]
+    ensure_completion_metadata()
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+    else:
+        run_default(argv)
+    # Only once the run is done, so the background build can't repeat its work
+    start_index_build()
+
+# Main execution
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Shell completion for the bible command.
+
+This module only uses the standard library and reads a small metadata file
+(book names, abbreviations and verse counts per chapter) written by
+bible_cli.write_completion_metadata, so completing never loads dataset.json
+or rich. The file lives in the user's cache directory, so completion works
+from any directory.
+"""
+import json
+import os
+import re
+import sys
+
+
+def user_cache_dir():
+    """Per-user cache directory for bible, e.g. ~/.cache/bible-cli"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, "bible-cli")
+
+
+METADATA_FILE = os.path.join(user_cache_dir(), "metadata.json")
+
+ROMAN_PREFIXES = {"i": "1", "ii": "2", "iii": "3"}
+
+COMPLETION_SCRIPTS = {
+    "bash": r'''# bible shell completion for bash
+_bible_complete() {
+    local line="${COMP_LINE:0:COMP_POINT}"
+    local IFS=$'\n'
+    COMPREPLY=($(bible-complete --word "${COMP_WORDS[COMP_CWORD]}" -- "${line#*bible}" 2>/dev/null))
+}
+complete -o nospace -o default -F _bible_complete bible
+''',
+    "zsh": r'''#compdef bible
+# bible shell completion for zsh
+_bible_complete() {
+    local line="${BUFFER[1,CURSOR]}"
+    local -a candidates
+    candidates=("${(@f)$(bible-complete --word "$PREFIX" -- "${line#*bible}" 2>/dev/null)}")
+    compadd -Q -S '' -- ${candidates:#}
+}
+compdef _bible_complete bible
+''',
+    "fish": r'''# bible shell completion for fish
+function __bible_complete
+    set -l line (string replace -r '^\s*\S+' '' -- (commandline -cp))
+    bible-complete --word (commandline -ct) -- "$line" 2>/dev/null
+end
+complete -c bible -f -a '(__bible_complete)'
+''',
+}
+
+
+def load_metadata(path=METADATA_FILE):
+    """Load the completion metadata, or None if it has not been written yet"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def split_roman(text):
+    """Split a leading I/II/III or 1/2/3 book number from a name"""
+    match = re.match(r"^(i{1,3}|[123])\s+(.*)$", text, re.IGNORECASE)
+    if not match:
+        return "", text
+    number = match.group(1)
+    return ROMAN_PREFIXES.get(number.lower(), number), match.group(2)
+
+
+def find_book(name, metadata):
+    """Resolve a typed book name or abbreviation to its metadata entry"""
+    number, rest = split_roman(name.strip())
+    normalized = f"{number} {rest}".strip().lower()
+    for book in metadata["books"]:
+        if book["name"].lower() == normalized or book.get("abbrev", "").lower() == name.strip().lower():
+            return book
+    return None
+
+
+def complete_reference(text, metadata):
+    """Complete a partial scripture reference to full references"""
+    # Chapter and verse: "John 3", "John 3:", "John 3:1"
+    match = re.match(r"^(.*?\S)\s+(\d*)(?::(\d*))?$", text)
+    if match and find_book(match.group(1), metadata):
+        typed_book, chapter, verse = match.groups()
+        verse_counts = find_book(typed_book, metadata)["verses"]
+        if verse is None:
+            return [f"{typed_book} {number}" for number in range(1, len(verse_counts) + 1)
+                    if str(number).startswith(chapter)]
+        if chapter.isdigit() and 1 <= int(chapter) <= len(verse_counts):
+            return [f"{typed_book} {chapter}:{number}" for number in range(1, verse_counts[int(chapter) - 1] + 1)
+                    if str(number).startswith(verse)]
+        return []
+
+    # Book names, keeping a typed Roman numeral prefix such as "II "
+    typed = text.lstrip()
+    number, rest = split_roman(typed)
+    typed_number = typed[:len(typed) - len(rest)].strip()
+    candidates = []
+    for book in metadata["books"]:
+        book_number, book_rest = split_roman(book["name"])
+        if number:
+            if book_number == number and book_rest.lower().startswith(rest.lower()):
+                candidates.append(f"{typed_number} {book_rest}")
+        elif book["name"].lower().startswith(typed.lower()) or book.get("abbrev", "").lower() == typed.lower():
+            candidates.append(book["name"])
+    return candidates
+
+
+def current_argument(line):
+    """The scripture being typed at the end of a command line"""
+    for quote in "\"'":
+        if line.count(quote) % 2:
+            return line[line.rindex(quote) + 1:]
+    return line.lstrip()
+
+
+def complete(line, metadata, word=None):
+    """Completions for a command line, trimmed to replace only the current word.
+
+    The scripture may span several shell words ("1 John 3:16"), so the part
+    of it before the current word is removed from each candidate.
+    """
+    argument = current_argument(line)
+    tokens = argument.split(" ")
+    candidates = []
+    # Book names have up to three words, so try the longest tail first
+    for size in range(min(len(tokens), 4), 0, -1):
+        tail = " ".join(tokens[-size:])
+        if tail.startswith("-"):
+            continue
+        candidates = complete_reference(tail, metadata)
+        if candidates:
+            argument = tail
+            break
+
+    if word is None:
+        return candidates
+    # Keep an opening quote that is part of the current word
+    quote = word[:1] if word[:1] in "\"'" else ""
+    word = word[len(quote):]
+    prefix = argument[:len(argument) - len(word)] if argument.endswith(word) else ""
+    return [quote + candidate[len(prefix):] for candidate in candidates if candidate.startswith(prefix)]
+
+
+def main(argv=None):
+    """Print completions, one per line: bible-complete [--word WORD] -- LINE"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["--script"] and len(argv) == 2 and argv[1] in COMPLETION_SCRIPTS:
+        sys.stdout.write(COMPLETION_SCRIPTS[argv[1]])
+        return
+    word = None
+    if argv[:1] == ["--word"] and len(argv) >= 2:
+        word, argv = argv[1], argv[2:]
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+
+    metadata = load_metadata()
+    if metadata is None:
+        return
+    candidates = complete(" ".join(argv), metadata, word)
+    if candidates:
+        sys.stdout.write("\n".join(candidates) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/wisyhambolu/Bible-Cli",
     packages=find_packages(),
+    py_modules=["bible_complete"],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: End Users/Desktop",
@@ -28,10 +29,12 @@ setup(
     install_requires=[
         "rich==13.7.0",
         "rapidfuzz==3.6.1",
+        "numpy>=1.24",
     ],
     entry_points={
         "console_scripts": [
             "bible=bible_cli.bible_cli:main",
+            "bible-complete=bible_complete:main",
         ],
     },
     package_data={
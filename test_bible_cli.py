@@ -1,13 +1,35 @@
 import unittest
+from unittest import mock
 import os
-import pickle
 from datetime import datetime
 from bible_cli import (
     lookup, confirm_best_match, search_keyword, advanced_search,
     get_verse_context, get_daily_verse, load_bookmarks, save_bookmark,
-    format_text, book_lookup
+    format_text, book_lookup, get_verse_id, verse_reference, find_similar_verses,
+    word_frequency, word_distribution, top_words, concordance, tokenize, verse_texts,
+    query_cache_path, load_cached_query, prune_query_cache, LiveSearch,
+    parse_query, query_search, gallop_intersect, gallop_difference,
+    parse_reference_range, PassageReader, iter_dataset_books, export_verses,
+    reading_plan, format_reference_range, format_reference_ranges, verse_refs,
+    query_bookmarks, load_bookmark_index, build_bookmark_index,
+    find_substring_ids, load_corpus_blob,
+    build_keyword_automaton, find_keywords_ids, search_keywords,
+    write_completion_metadata, SearchHit, SearchResults, VerseRef,
+    load_cached_arrays, save_bundle_index, build_index_bundle, index_bundle_dir, INDEX_BUILDERS,
+    check_regex, regex_search_ids, daily_verse_rows,
+    write_compressed_corpus, CompressedCorpus, CompressedVerses, CompressedChapters, COMPRESSION_CODECS
 )
+from bible_complete import complete, load_metadata
+import bible_cli
 import json
+import csv
+import re
+import io
+import tempfile
+import subprocess
+import sys
+import threading
+import numpy as np
 
 # Load the dataset
 with open("dataset.json") as f:
@@ -22,21 +44,16 @@ class TestBibleCli(unittest.TestCase):
         self.test_verse_range = "1-3"
         self.test_keyword = "God"
         self.test_regex = r"light.*darkness"
-        # Create a temporary bookmarks file for testing
-        self.test_bookmarks_file = "test_bookmarks.pkl"
-        self.original_bookmarks = {}
-        if os.path.exists(self.test_bookmarks_file):
-            with open(self.test_bookmarks_file, "rb") as f:
-                self.original_bookmarks = pickle.load(f)
-            os.remove(self.test_bookmarks_file)
-
-    def tearDown(self):
-        # Restore original bookmarks file
-        if os.path.exists(self.test_bookmarks_file):
-            os.remove(self.test_bookmarks_file)
-        if self.original_bookmarks:
-            with open(self.test_bookmarks_file, "wb") as f:
-                pickle.dump(self.original_bookmarks, f)
+        # Keep cached search results and bookmarks out of the working directory
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.test_bookmarks_file = os.path.join(scratch.name, "bookmarks.pkl")
+        for name, value in [("QUERY_CACHE_DIR", os.path.join(scratch.name, "queries")),
+                            ("BOOKMARKS_FILE", self.test_bookmarks_file),
+                            ("BOOKMARK_INDEX_FILE", os.path.join(scratch.name, "bookmarks_index.pkl"))]:
+            patcher = mock.patch.object(bible_cli, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
     def test_valid_lookup(self):
         """Test valid scripture lookup"""
@@ -298,5 +315,495 @@ class TestBibleCli(unittest.TestCase):
         chapter_data = book_lookup[book_name.lower()]["chapters"][int(chapter) - 1]
         self.assertEqual(len(verses), len(chapter_data))  # Should return all verses
 
+    def test_verse_id_roundtrip(self):
+        """Test that verse ids map back to their references"""
+        verse_id = get_verse_id("John", 3, 16)
+        self.assertEqual(verse_reference(verse_id), ("John", 3, 16))
+        self.assertEqual(get_verse_id("Genesis", 1, 1), 0)
+
+    def test_similar_verses(self):
+        """Test that similar verses exclude the verse itself and are limited"""
+        results = find_similar_verses("Genesis", 1, 1, limit=5)
+        self.assertTrue(0 < len(results) <= 5)
+        self.assertNotIn(("Genesis", 1, 1), [result[:3] for result in results])
+        for book, chapter, verse, text in results:
+            self.assertEqual(book_lookup[book.lower()]["chapters"][chapter - 1][verse - 1], text)
+
+    def test_word_statistics(self):
+        """Test that word statistics agree with the verse text"""
+        expected = sum(tokenize(text).count("god") for text in verse_texts)
+        frequency = dict(word_frequency("God"))
+        self.assertEqual(sum(frequency.values()), expected)
+        chapters = dict(word_distribution("god", "Genesis"))
+        self.assertEqual(sum(chapters.values()), frequency["Genesis"])
+        self.assertEqual(chapters[1], sum(tokenize(text).count("god")
+                                          for text in book_lookup["genesis"]["chapters"][0]))
+        self.assertEqual(word_frequency("notaword"), [])
+
+    def test_top_words_and_concordance(self):
+        """Test frequency ranking and concordance queries"""
+        ranking = top_words("Genesis", limit=5)
+        self.assertEqual(len(ranking), 5)
+        counts = [count for _, count in ranking]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        entries = concordance("beginning", "Genesis")
+        self.assertIn(("Genesis", 1, 1, 1), entries)
+
+    def test_query_cache(self):
+        """Test that repeated searches are served from the result cache"""
+        options = {"testament": "new", "min_words": 5}
+        results = advanced_search("Grace", options)
+        self.assertEqual(load_cached_query("grace", options),
+                         [get_verse_id(*result[:3]) for result in results])
+        self.assertEqual(advanced_search("Grace", options), results)
+        self.assertEqual(advanced_search("Grace", options, use_cache=False), results)
+
+    def test_query_cache_eviction(self):
+        """Test that stale and excess cache entries are evicted"""
+        advanced_search("mercy", {})
+        stale_path = os.path.join(bible_cli.QUERY_CACHE_DIR, "0000000000000000-stale.ids")
+        with open(stale_path, "wb") as f:
+            f.write(b"\x00\x00\x00\x00")
+        prune_query_cache()
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertTrue(os.path.exists(query_cache_path("mercy", {})))
+        prune_query_cache(max_bytes=0)
+        self.assertIsNone(load_cached_query("mercy", {}))
+
+    def test_live_search_narrowing(self):
+        """Test that incremental live search matches a full scan"""
+        search = LiveSearch()
+        for query in ["l", "li", "lig", "ligh", "light", "lig", "lo", "love"]:
+            expected = [verse_id for verse_id, text in enumerate(verse_texts) if query in text.lower()]
+            self.assertEqual(search.update(query), expected, query)
+        self.assertEqual(search.update(""), [])
+        self.assertIn("beginning", search.complete("in the begin"))
+        self.assertEqual(search.complete("the "), [])
+
+    @unittest.skipUnless(bible_cli.termios, "needs a POSIX terminal")
+    def test_read_key_sequences(self):
+        """Test that escape sequences and UTF-8 characters are read whole"""
+        master, slave = os.openpty()
+        self.addCleanup(os.close, master)
+        self.addCleanup(os.close, slave)
+        os.write(master, "\x1b[A\u00e9q".encode("utf-8"))  # Typed before raw mode starts
+        with mock.patch.object(sys, "stdin", mock.Mock(fileno=lambda: slave)), bible_cli.raw_terminal():
+            self.assertEqual([bible_cli.read_key() for _ in range(3)], ["\x1b[A", "\u00e9", "q"])
+            os.write(master, b"\x1b")
+            self.assertEqual(bible_cli.read_key(), "\x1b")
+
+    def test_gallop_set_operations(self):
+        """Test galloping intersection and difference of sorted lists"""
+        large = list(range(0, 1000, 3))
+        small = [0, 5, 9, 500, 501, 999, 2000]
+        self.assertEqual(gallop_intersect(small, large), [0, 9, 501, 999])
+        self.assertEqual(gallop_difference(small, large), [5, 500, 2000])
+
+    def test_boolean_query(self):
+        """Test boolean queries against a scan of the verse text"""
+        results = query_search('(light OR darkness) NOT god book:Genesis')
+        expected = []
+        for verse_id, text in enumerate(verse_texts):
+            words = set(tokenize(text))
+            book = verse_reference(verse_id)[0]
+            if book == "Genesis" and ("light" in words or "darkness" in words) and "god" not in words:
+                expected.append(verse_reference(verse_id))
+        self.assertEqual([result[:3] for result in results], expected)
+
+        results = query_search('"In the beginning" chapter:1')
+        self.assertIn(("Genesis", 1, 1), [result[:3] for result in results])
+        for query in ["(faith", "faith OR", "", "color:red", "testament:middle"]:
+            with self.subTest(query):
+                with self.assertRaises(ValueError):
+                    parse_query(query)
+
+    def test_parse_reference_range(self):
+        """Test references resolving to verse id ranges"""
+        genesis_1 = len(book_lookup["genesis"]["chapters"][0])
+        genesis_2 = len(book_lookup["genesis"]["chapters"][1])
+        cases = {
+            "Genesis 1": (0, genesis_1),
+            "Genesis 1:2": (1, 2),
+            "Genesis 1:2-4": (1, 4),
+            "Genesis 1-2": (0, genesis_1 + genesis_2),
+            "Genesis 1:31-2:3": (30, genesis_1 + 3),
+            "John 3:16": (get_verse_id("John", 3, 16), get_verse_id("John", 3, 16) + 1),
+        }
+        for reference, expected in cases.items():
+            with self.subTest(reference):
+                self.assertEqual(parse_reference_range(reference, non_interactive=True), expected)
+        start, end = parse_reference_range("Genesis", non_interactive=True)
+        self.assertEqual((start, verse_reference(end - 1)[0]), (0, "Genesis"))
+        self.assertNotEqual(verse_reference(end)[0], "Genesis")
+        for reference in ["FakeBook 1", "Genesis 0", "Genesis 51", "Genesis 1:40", "Genesis 2:1-1:3", "3:16"]:
+            with self.subTest(reference):
+                self.assertIsNone(parse_reference_range(reference, non_interactive=True))
+
+    def test_verse_context_across_chapters(self):
+        """Test that context can cross chapter boundaries"""
+        context = get_verse_context("Genesis", 2, 1, cross_chapters=True)
+        self.assertEqual([entry[:2] for entry in context], [(1, 30), (1, 31), (2, 1), (2, 2), (2, 3)])
+        self.assertEqual(context[2][2], book_lookup["genesis"]["chapters"][1][0])
+        self.assertEqual(get_verse_context("Genesis", 1, 1, cross_chapters=True)[0][:2], (1, 1))
+        self.assertIsNone(get_verse_context("Genesis", 1, 100, cross_chapters=True))
+
+    def test_passage_reader_pages(self):
+        """Test that the reader pages across chapters and keeps visited pages"""
+        start, end = parse_reference_range("Genesis 1:25-2:12", non_interactive=True)
+        reader = PassageReader(start, end, page_size=10)
+        try:
+            self.assertEqual(reader.page_count, 2)
+            first = reader.page(0)
+            self.assertEqual(first[0][0], "Genesis 1:25")
+            self.assertEqual(first[-1][0], "Genesis 2:3")
+            self.assertEqual(reader.page(1)[-1][0], "Genesis 2:12")
+            self.assertIs(reader.page(0), first)
+        finally:
+            reader.close()
+
+    def test_streaming_loader(self):
+        """Test that the streaming loader parses books like json.load"""
+        books = [
+            {"name": "First", "chapters": [["A verse with ] and [ and {braces}", "\"Quoted\", he said."]]},
+            {"name": "Second", "abbrev": "2nd", "chapters": [["\u00c9 accent"], ["x" * 200]]},
+        ]
+        path = "test_dataset.json"
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\ufeff [\n" + " ,\n".join(json.dumps(book) for book in books) + "\n]\n")
+            for chunk_size in (3, 64, 1 << 16):
+                with self.subTest(chunk_size=chunk_size):
+                    self.assertEqual(list(iter_dataset_books(path, chunk_size)), books)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write('[{"name": "Broken", "chapters": [["unterminated')
+            with self.assertRaises(ValueError):
+                list(iter_dataset_books(path, 8))
+        finally:
+            os.remove(path)
+
+    def test_export_formats(self):
+        """Test exporting a passage as CSV, JSON Lines and Markdown"""
+        verse_ids = range(*parse_reference_range("Genesis 1:1-3", non_interactive=True))
+        first_verse = "In the beginning God created the heaven and the earth."
+
+        output = io.StringIO()
+        self.assertEqual(export_verses(verse_ids, output, "csv"), 3)
+        rows = list(csv.reader(io.StringIO(output.getvalue())))
+        self.assertEqual(rows[0], ["book", "chapter", "verse", "text"])
+        self.assertEqual(rows[1], ["Genesis", "1", "1", first_verse])
+
+        output = io.StringIO()
+        export_verses(iter(verse_ids), output, "jsonl")
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0]), {"book": "Genesis", "chapter": 1, "verse": 1, "text": first_verse})
+
+        output = io.StringIO()
+        export_verses(verse_ids, output, "markdown")
+        self.assertIn(f"| Genesis 1:1 | {first_verse} |", output.getvalue().splitlines())
+        with self.assertRaises(ValueError):
+            export_verses(verse_ids, io.StringIO(), "xml")
+
+    def test_export_search_file(self):
+        """Test exporting the verses matching any keyword in a file"""
+        with tempfile.TemporaryDirectory() as directory:
+            keyword_file = os.path.join(directory, "topics.txt")
+            with open(keyword_file, "w", encoding="utf-8") as f:
+                f.write("light\n# comment\ndarkness\n")
+            output_file = os.path.join(directory, "verses.jsonl")
+            bible_cli.run_export(["--search-file", keyword_file, "--testament", "old", "-f", "jsonl", "-o", output_file])
+            with open(output_file, encoding="utf-8") as f:
+                references = [(row["book"], row["chapter"], row["verse"]) for row in map(json.loads, f)]
+
+        options = {"testament": "old"}
+        expected = sorted(set(bible_cli.advanced_search_ids("light", options)[0]) | set(bible_cli.advanced_search_ids("darkness", options)[0]))
+        self.assertEqual(references, [verse_reference(verse_id) for verse_id in expected])
+
+    def test_export_errors(self):
+        """Test that export errors go to stderr and exit non-zero"""
+        for argv in [["-q", "faith AND ("], ["-s", "(a+)+", "--regex"], ["Fakebook 1"],
+                     ["John 3:16", "-o", os.path.join("missing-directory", "verses.csv")]]:
+            with self.subTest(argv):
+                stdout, stderr = io.StringIO(), io.StringIO()
+                with mock.patch.object(sys, "stdout", stdout), mock.patch.object(sys, "stderr", stderr):
+                    with self.assertRaises(SystemExit) as raised:
+                        bible_cli.run_export(argv)
+                self.assertEqual(raised.exception.code, 1)
+                self.assertEqual(stdout.getvalue(), "")
+                self.assertIn("Error:", stderr.getvalue())
+
+    def test_format_reference_range(self):
+        """Test that formatted references parse back to the same range"""
+        for reference in ["Genesis", "Genesis 1", "Genesis 1-3", "Genesis 1:5", "Genesis 1:5-9",
+                          "Genesis 1:31-2:3", "Jude", "John 3:16"]:
+            with self.subTest(reference):
+                passage = parse_reference_range(reference, non_interactive=True)
+                self.assertEqual(format_reference_range(*passage), reference)
+        ruth = parse_reference_range("Ruth", non_interactive=True)
+        jonah_1 = parse_reference_range("Jonah 1", non_interactive=True)
+        verse_ids = list(range(*ruth)) + list(range(*jonah_1))
+        self.assertEqual(format_reference_ranges(verse_ids), ["Ruth", "Jonah 1"])
+
+    def test_reading_plan(self):
+        """Test that a reading plan covers the range in balanced chapter chunks"""
+        ranges = [parse_reference_range("Genesis", non_interactive=True),
+                  parse_reference_range("Matthew", non_interactive=True)]
+        plan = reading_plan(ranges, 20)
+        self.assertEqual(len(plan), 20)
+        covered = [verse_id for verse_ids, _ in plan for verse_id in verse_ids]
+        self.assertEqual(covered, [verse_id for start, end in ranges for verse_id in range(start, end)])
+        for verse_ids, words in plan:
+            self.assertEqual(verse_refs[verse_ids[0]][2], 1)  # Days start at a chapter
+            self.assertEqual(words, sum(len(verse_texts[verse_id].split()) for verse_id in verse_ids))
+        sizes = [words for _, words in plan]
+        largest_chapter = max(sum(len(text.split()) for text in chapter)
+                              for name in ("genesis", "matthew") for chapter in book_lookup[name]["chapters"])
+        self.assertLessEqual(max(sizes) - min(sizes), 2 * largest_chapter)
+
+        plan = reading_plan([parse_reference_range("Genesis 1", non_interactive=True)], 100, split="verse")
+        self.assertEqual(len(plan), len(book_lookup["genesis"]["chapters"][0]))
+        self.assertEqual(len(reading_plan([parse_reference_range("Genesis 1", non_interactive=True)], 5)), 1)
+
+    def test_bookmark_queries(self):
+        """Test filtering bookmarks through the secondary indexes"""
+        save_bookmark("Romans 8:1", "All things work together for good", ["promise"])
+        save_bookmark("Genesis 1:1", "Creation", ["study"])
+        save_bookmark("Romans 5:8", "While we were yet sinners", ["promise", "study"])
+        save_bookmark("John 3:16", "For God so loved the world")
+
+        entries, total = query_bookmarks()
+        self.assertEqual(total, 4)
+        self.assertEqual([ref for ref, _ in entries], ["Genesis 1:1", "John 3:16", "Romans 5:8", "Romans 8:1"])
+        entries, total = query_bookmarks(reference="Romans", tag="Promise")
+        self.assertEqual([ref for ref, _ in entries], ["Romans 5:8", "Romans 8:1"])
+        entries, _ = query_bookmarks(text="work good")
+        self.assertEqual([ref for ref, _ in entries], ["Romans 8:1"])
+        today = datetime.now().date().isoformat()
+        self.assertEqual(query_bookmarks(since=today, until=today)[1], 4)
+        self.assertEqual(query_bookmarks(until="2000-01-01")[1], 0)
+        entries, total = query_bookmarks(page=2, page_size=3)
+        self.assertEqual((total, [ref for ref, _ in entries]), (4, ["Romans 8:1"]))
+
+        # Re-saving replaces the indexed note, tags and date
+        save_bookmark("Romans 8:1", "Called according to his purpose")
+        self.assertEqual(query_bookmarks(text="good")[1], 0)
+        self.assertEqual(query_bookmarks(tag="promise")[1], 1)
+        rebuilt = build_bookmark_index(load_bookmarks())
+        index = load_bookmark_index()
+        self.assertEqual(rebuilt["verses"], index["verses"])
+        self.assertEqual(rebuilt["dates"], index["dates"])
+
+    def test_corpus_blob_search(self):
+        """Test substring search over the case-folded corpus blob"""
+        blob, offsets = load_corpus_blob()
+        self.assertEqual(len(offsets), len(verse_texts) + 1)
+        self.assertEqual(blob[offsets[0]:offsets[1] - 1], verse_texts[0].lower())
+        for keyword in ["LIGHT", "the earth.", "in the beginning", "zzzz"]:
+            with self.subTest(keyword):
+                expected = [verse_id for verse_id, text in enumerate(verse_texts) if keyword.lower() in text.lower()]
+                self.assertEqual(find_substring_ids(keyword), expected)
+        # A match may not run from the end of one verse into the next
+        self.assertNotIn(0, find_substring_ids(verse_texts[0][-4:] + verse_texts[1][:4]))
+        genesis_1 = parse_reference_range("Genesis 1", non_interactive=True)
+        self.assertEqual(find_substring_ids("", *genesis_1), list(range(*genesis_1)))
+        self.assertTrue(all(genesis_1[0] <= verse_id < genesis_1[1]
+                            for verse_id in find_substring_ids("god", *genesis_1)))
+
+    def test_keyword_automaton(self):
+        """Test Aho-Corasick matching of overlapping keywords"""
+        keywords = ["he", "she", "his", "hers"]
+        transitions, outputs = build_keyword_automaton(keywords)
+        state, found = 0, []
+        for position, char in enumerate("ushers"):
+            state = transitions[state].get(char, 0)
+            found += [(position, keywords[idx]) for idx in outputs[state]]
+        self.assertEqual(sorted(found), [(3, "he"), (3, "she"), (5, "hers")])
+
+    def test_multi_keyword_search(self):
+        """Test that one-pass multi-keyword search matches single searches"""
+        keywords = ["light", "darkness", "the earth", "LORD", "beginning", "zzzz"]
+        genesis_1 = parse_reference_range("Genesis 1", non_interactive=True)
+        with mock.patch.object(bible_cli, "MULTI_SEARCH_AUTOMATON_THRESHOLD", 0):
+            self.assertEqual(find_keywords_ids(keywords), [find_substring_ids(keyword) for keyword in keywords])
+            self.assertEqual(find_keywords_ids(keywords, [genesis_1, (100, 200)]),
+                             [find_substring_ids(keyword, *genesis_1) + find_substring_ids(keyword, 100, 200)
+                              for keyword in keywords])
+            options = {"testament": "old", "min_words": 5}
+            results = search_keywords(["light", "Darkness"], options)
+            for keyword in ["light", "Darkness"]:
+                self.assertEqual(results[keyword], advanced_search(keyword, options, use_cache=False))
+
+    def test_shell_completion(self):
+        """Test completing book names, chapters and verses from metadata"""
+        path = "test_metadata.json"
+        write_completion_metadata(path)
+        try:
+            metadata = load_metadata(path)
+        finally:
+            os.remove(path)
+        john = book_lookup["1 john"]
+        self.assertEqual(complete("Gen", metadata), ["Genesis"])
+        self.assertIn("I John", complete("I Jo", metadata))
+        self.assertEqual(complete("Genesis 1:", metadata),
+                         [f"Genesis 1:{verse}" for verse in range(1, len(dataset[0]["chapters"][0]) + 1)])
+        self.assertEqual(complete("1 John ", metadata),
+                         [f"1 John {chapter}" for chapter in range(1, len(john["chapters"]) + 1)])
+        self.assertIn("Genesis 10", complete("Genesis 1", metadata))
+        # Only the current shell word is replaced
+        self.assertIn("2:1", complete("--regex '1 John 2:1", metadata, word="2:1"))
+        self.assertIn("Genesis", complete(dataset[0]["abbrev"], metadata))
+        self.assertEqual(complete("Genesis 999:", metadata), [])
+
+    @unittest.skipIf(os.name == "nt", "uses XDG_CACHE_HOME")
+    def test_completion_from_any_directory(self):
+        """Test that bible-complete finds the metadata outside the dataset directory"""
+        with tempfile.TemporaryDirectory() as cache_home, tempfile.TemporaryDirectory() as elsewhere:
+            write_completion_metadata(os.path.join(cache_home, "bible-cli", "metadata.json"))
+            script = os.path.abspath("bible_complete.py")
+            env = dict(os.environ, XDG_CACHE_HOME=cache_home)
+            output = subprocess.run([sys.executable, script, "--word", "Gen", "--", "Gen"], cwd=elsewhere,
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            self.assertEqual(output.split(), ["Genesis"])
+            output = subprocess.run([sys.executable, script, "--script", "bash"], cwd=elsewhere,
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            self.assertIn("complete -o nospace", output)
+
+    def test_lazy_search_results(self):
+        """Test that search hits hold only a verse id and unpack like tuples"""
+        results = advanced_search("the earth", {}, use_cache=False)
+        self.assertIsInstance(results, SearchResults)
+        hit = results[0]
+        self.assertIsInstance(hit, SearchHit)
+        self.assertFalse(hasattr(hit, "__dict__"))
+        book, chapter, verse, text = hit
+        self.assertEqual((book, chapter, verse), ("Genesis", 1, 1))
+        self.assertEqual(hit.spans, [(44, 53)])
+        self.assertEqual(text, "In the beginning God created the heaven and [yellow]the earth[/yellow].")
+        self.assertEqual(hit, (book, chapter, verse, text))
+        self.assertEqual(results[1:3], [results[1], results[2]])
+        self.assertEqual(tuple(VerseRef(0)), ("Genesis", 1, 1, verse_texts[0]))
+        # Regex highlights keep the matched text rather than the pattern
+        self.assertIn("[yellow]In the beginning[/yellow]",
+                      advanced_search(r"in the \w+ing", {"regex": True}, use_cache=False)[0][3])
+
+    def test_index_bundle(self):
+        """Test that indexes are built once and memory-mapped from the bundle"""
+        with tempfile.TemporaryDirectory() as cache_dir, mock.patch.object(bible_cli, "CACHE_DIR", cache_dir):
+            builds = []
+            def build():
+                builds.append(1)
+                return {"values": np.arange(5)}
+            self.assertEqual(load_cached_arrays("demo", build)["values"].tolist(), list(range(5)))
+            cached = load_cached_arrays("demo", build)
+            self.assertIsInstance(cached["values"], np.memmap)
+            self.assertEqual(len(builds), 1)
+            # A second writer leaves the first index in place
+            save_bundle_index("demo", {"values": np.zeros(2)})
+            self.assertEqual(load_cached_arrays("demo", build)["values"].tolist(), list(range(5)))
+            self.assertEqual(os.listdir(os.path.join(index_bundle_dir(), "demo")), ["values.npy"])
+
+            os.makedirs(os.path.join(cache_dir, "index-0000000000000000"))
+            build_index_bundle()
+            self.assertEqual(os.listdir(cache_dir), [os.path.basename(index_bundle_dir())])
+            self.assertTrue(set(INDEX_BUILDERS) <= set(os.listdir(index_bundle_dir())))
+
+    def test_index_build_marker(self):
+        """Test waiting for a running background build instead of repeating it"""
+        with tempfile.TemporaryDirectory() as cache_dir, mock.patch.object(bible_cli, "CACHE_DIR", cache_dir):
+            os.makedirs(index_bundle_dir())
+            marker = os.path.join(index_bundle_dir(), bible_cli.INDEX_BUILD_MARKER)
+            builder = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+            self.addCleanup(builder.wait)
+            self.addCleanup(builder.kill)
+            with open(marker, "w", encoding="utf-8") as f:
+                f.write(str(builder.pid))
+            self.assertTrue(bible_cli.index_build_running())
+
+            writer = threading.Timer(0.2, save_bundle_index, ("demo", {"values": np.arange(3)}))
+            writer.start()
+            self.addCleanup(writer.join)
+            builds = []
+            arrays = load_cached_arrays("demo", lambda: builds.append(1) or {"values": np.zeros(3)})
+            self.assertEqual(arrays["values"].tolist(), [0, 1, 2])
+            self.assertEqual(builds, [])
+
+            builder.kill()
+            builder.wait()
+            self.assertFalse(bible_cli.index_build_running())
+
+    def test_bounded_regex(self):
+        """Test rejecting exponential regexes and stopping slow ones"""
+        for keyword in ["(a+)+", "(a*)*", r"(\w+\s?)+$", "(a|aa)+", "(", r"(?=(a+)+)"]:
+            with self.subTest(keyword):
+                with self.assertRaises(ValueError):
+                    check_regex(keyword)
+                with self.assertRaises(ValueError):
+                    advanced_search(keyword, {"regex": True})
+        for keyword in [r"(\w+\s)+", "(ab|a)+", r"\b(\w+)\s+\1\b", r"(\d{1,3}\.){3}"]:
+            check_regex(keyword)
+
+        everything = [(0, len(verse_texts))]
+        verse_ids, truncated = regex_search_ids(self.test_regex, everything)
+        self.assertFalse(truncated)
+        self.assertEqual(verse_ids, [verse_id for verse_id, text in enumerate(verse_texts)
+                                     if re.search(self.test_regex, text, re.IGNORECASE)])
+        verse_ids, truncated = regex_search_ids("god", everything, verse_budget=100)
+        self.assertTrue(truncated)
+        self.assertTrue(all(verse_id < 100 for verse_id in verse_ids))
+        # Not caught statically, but stopped by the time budget
+        verse_ids, truncated = regex_search_ids("(.+.+)+X", everything, time_budget=0.2)
+        self.assertTrue(truncated)
+
+    def test_thread_safe_warm_up(self):
+        """Test that concurrent callers of a lazy loader share one build"""
+        from concurrent.futures import ThreadPoolExecutor
+        with mock.patch.object(bible_cli, "_corpus_blob", None):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                blobs = list(executor.map(lambda _: load_corpus_blob(), range(8)))
+            self.assertTrue(all(blob is blobs[0] for blob in blobs))
+
+        today = datetime(2025, 4, 13).date()
+        (reference, text), = daily_verse_rows(today)
+        book, chapter, verse, verse_text = get_daily_verse(today)
+        self.assertEqual(reference, f"{book} {chapter}:{verse}")
+        self.assertEqual(text, format_text(verse_text.replace("{", "(").replace("}", ")")))
+
+    def test_compressed_corpus(self):
+        """Test random access to a block-compressed corpus"""
+        with tempfile.TemporaryDirectory() as directory:
+            for codec in COMPRESSION_CODECS:
+                with self.subTest(codec):
+                    path = os.path.join(directory, f"{codec}.bcz")
+                    self.assertLess(write_compressed_corpus(path, codec), os.path.getsize("dataset.json"))
+                    corpus = CompressedCorpus(path)
+                    verses = CompressedVerses(corpus)
+                    self.assertEqual(len(verses), len(verse_texts))
+                    self.assertEqual(list(verses), list(verse_texts))
+                    self.assertEqual(verses[-1], verse_texts[-1])
+                    genesis = CompressedChapters(corpus, 0, len(dataset[0]["chapters"]))
+                    self.assertEqual(list(genesis[0]), dataset[0]["chapters"][0])
+                    # A lookup decompresses its chapter once, then hits the LRU
+                    corpus.block.cache_clear()
+                    verses[5], verses[6]
+                    self.assertEqual(corpus.block.cache_info().misses, 1)
+                    corpus.data.close()
+
+            with open(os.path.join(directory, "bad.bcz"), "wb") as f:
+                f.write(b"not a corpus")
+            with self.assertRaises(ValueError):
+                CompressedCorpus(os.path.join(directory, "bad.bcz"))
+
+            # With only the compressed file, the CLI reads it instead
+            os.rename(os.path.join(directory, "zlib.bcz"), os.path.join(directory, "dataset.bcz"))
+            script = ("import bible_cli; print(bible_cli.corpus_file); "
+                      "print(bible_cli.lookup('John', 3, 16, non_interactive=True)[3][0]); "
+                      "print(bible_cli.get_verse_context('John', 3, 16)[0][1]); "
+                      "bible_cli.warm_up_indexes(); print(bible_cli._corpus_blob)")
+            output = subprocess.run([sys.executable, "-c", script], cwd=directory, capture_output=True, text=True,
+                                    env=dict(os.environ, PYTHONPATH=os.getcwd()), check=True).stdout.splitlines()
+            john = book_lookup["john"]["chapters"][2]
+            # The menu warm-up leaves the whole text compressed
+        self.assertEqual(output, ["dataset.bcz", john[15], john[13], "None"])
+
 if __name__ == '__main__':
     unittest.main()